@@ -0,0 +1,173 @@
+import queue
+import smtplib
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from email.message import EmailMessage
+
+import requests
+
+# Base quiet period after an alert for the same product; doubles with alerts_sent up to 8x
+ALERT_COOLDOWN = 6 * 3600
+
+
+def describe(alert):
+    return (f"{alert['name']}: ${alert['current_price']:.2f} "
+            f"(target ${alert['target_price']:.2f}, save ${alert['savings']:.2f}) {alert['url']}")
+
+
+class CallbackSink:
+    """Hands each digest to a front-end callback (GUI popup/bell, headless log)"""
+
+    def __init__(self, callback):
+        self.callback = callback
+
+    def send(self, digest):
+        self.callback(digest)
+
+
+class LogFileSink:
+    """Appends one line per alert to a file"""
+
+    def __init__(self, path):
+        self.path = path
+
+    def send(self, digest):
+        stamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        with open(self.path, 'a', encoding='utf-8') as f:
+            for alert in digest:
+                f.write(f"[{stamp}] {describe(alert)}\n")
+
+
+class WebhookSink:
+    """POSTs the digest as JSON to a (local) webhook URL"""
+
+    def __init__(self, url, timeout=10):
+        self.url = url
+        self.timeout = timeout
+
+    def send(self, digest):
+        response = requests.post(self.url, json={'alerts': digest}, timeout=self.timeout)
+        response.raise_for_status()
+
+
+class SmtpSink:
+    """Mails the digest through an SMTP server (a local relay by default)"""
+
+    def __init__(self, to_addr, from_addr='price-tracker@localhost', host='localhost', port=25):
+        self.to_addr = to_addr
+        self.from_addr = from_addr
+        self.host = host
+        self.port = port
+
+    def send(self, digest):
+        message = EmailMessage()
+        message['Subject'] = f"🎯 {len(digest)} price alert{'s' if len(digest) > 1 else ''}"
+        message['From'] = self.from_addr
+        message['To'] = self.to_addr
+        message.set_content("\n".join(describe(alert) for alert in digest))
+        with smtplib.SMTP(self.host, self.port, timeout=10) as smtp:
+            smtp.send_message(message)
+
+
+class AlertDispatcher:
+    """Throttles, coalesces and delivers price alerts without blocking price checks
+
+    submit() decides synchronously whether an alert is due: a product alerted
+    within its cooldown is skipped unless its price dropped further since. Alerts
+    submitted inside batch() are delivered as one digest when the batch ends.
+    Delivery to the sinks happens on a background thread.
+    """
+
+    def __init__(self, sinks=(), cooldown=ALERT_COOLDOWN, log=None):
+        self.sinks = list(sinks)
+        self.cooldown = cooldown
+        self.log_message = log or (lambda message: None)
+        # Alerts of each thread's open batch, by thread id
+        self.pending = {}
+        self.lock = threading.Lock()
+        self.queue = queue.Queue()
+        self.thread = threading.Thread(target=self.deliver_loop, daemon=True)
+        self.thread.start()
+
+    def cooldown_for(self, product):
+        return self.cooldown * min(2 ** max(product['alerts_sent'] - 1, 0), 8)
+
+    def submit(self, product, now=None):
+        """Queue an alert for product unless it is throttled; returns True if queued"""
+        now = time.time() if now is None else now
+        last_at, last_price = product.get('last_alert_at'), product.get('last_alert_price')
+        if last_at and now - last_at < self.cooldown_for(product) \
+                and last_price is not None and product['current_price'] >= last_price:
+            return False
+
+        product['alerts_sent'] += 1
+        product['last_alert_at'] = now
+        product['last_alert_price'] = product['current_price']
+        alert = {
+            'id': product.get('id'),
+            'name': product['name'],
+            'url': product['url'],
+            'current_price': product['current_price'],
+            'target_price': product['target_price'],
+            'savings': product['target_price'] - product['current_price']
+        }
+        with self.lock:
+            pending = self.pending.get(threading.get_ident())
+            if pending is not None:
+                # Deduplicate within a batch: keep the latest alert per product
+                pending[alert['id'] or alert['url']] = alert
+                return True
+        self.queue.put([alert])
+        return True
+
+    @contextmanager
+    def batch(self):
+        """Collect alerts this thread submits inside the block into a single digest
+
+        Batches open on other threads (say a Check All during a scheduled sweep)
+        collect their own digests; a nested batch adds to the enclosing one.
+        """
+        thread = threading.get_ident()
+        with self.lock:
+            nested = thread in self.pending
+            if not nested:
+                self.pending[thread] = {}
+        if nested:
+            yield
+            return
+        try:
+            yield
+        finally:
+            with self.lock:
+                digest = list(self.pending.pop(thread).values())
+            if digest:
+                self.queue.put(digest)
+
+    def deliver_loop(self):
+        while True:
+            digest = self.queue.get()
+            if digest is None:
+                return
+            for sink in self.sinks:
+                try:
+                    sink.send(digest)
+                except Exception as e:
+                    self.log_message(f"Alert delivery via {type(sink).__name__} failed: {str(e)}")
+
+    def close(self):
+        """Deliver what is queued and stop the delivery thread"""
+        self.queue.put(None)
+        self.thread.join(timeout=30)
+
+
+def alert_summary(digest):
+    """Human readable text for a digest, used by popups and logs"""
+    if len(digest) == 1:
+        alert = digest[0]
+        return (f"Product: {alert['name']}\n"
+                f"Current Price: ${alert['current_price']:.2f}\n"
+                f"Target Price: ${alert['target_price']:.2f}\n"
+                f"You Save: ${alert['savings']:.2f}")
+    return "\n".join(f"• {describe(alert)}" for alert in digest)
@@ -0,0 +1,199 @@
+import time
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+DAY = 86400
+MOVING_AVERAGE_DAYS = (7, 30)
+MEDIAN_DAYS = (30, 90)
+# A fall of at least this fraction between consecutive observations is a drop event
+DROP_THRESHOLD = 0.05
+# Being this far under the 90-day median earns the full median part of the deal score
+DEAL_DISCOUNT = 0.2
+
+COLUMNS = ('current', 'target', 'low', 'high', 'ma7', 'ma30', 'median30', 'median90', 'below30', 'below90',
+           'drops', 'last_drop_at', 'last_drop', 'score')
+
+
+def segment_reduce(ufunc, values, offsets, empty):
+    """ufunc reduction of each values[offsets[i]:offsets[i + 1]]; empty segments get empty"""
+    out = np.full(len(offsets) - 1, empty, dtype=np.float64)
+    nonempty = np.diff(offsets) > 0
+    if values.size:
+        out[nonempty] = ufunc.reduceat(values, offsets[:-1][nonempty])
+    return out
+
+
+def segment_median(values, rows, count):
+    """Median per row index (NaN where a row has none) of values sorted by (row, value)"""
+    if not values.size:
+        return np.full(count, np.nan)
+    sizes = np.bincount(rows, minlength=count)
+    starts = np.cumsum(sizes) - sizes
+    # Rows without values point at a valid index; their result is masked below
+    lo = np.minimum(starts + np.maximum(sizes - 1, 0) // 2, values.size - 1)
+    hi = np.minimum(starts + sizes // 2, values.size - 1)
+    return np.where(sizes > 0, (values[lo] + values[hi]) / 2, np.nan)
+
+
+def segment_mean(values, rows, count):
+    """Mean of values per row index (NaN where a row has none)"""
+    sizes = np.bincount(rows, minlength=count)
+    totals = np.bincount(rows, weights=values, minlength=count)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(sizes > 0, totals / sizes, np.nan)
+
+
+def stack_histories(histories):
+    """Concatenate full-resolution and rollup tiers of many PriceHistory objects
+
+    Returns (offsets, timestamps, prices, rollup_offsets, buckets, lows, highs,
+    lasts); product i owns timestamps[offsets[i]:offsets[i + 1]] and likewise
+    for the rollup columns. The per-product buffers are only read, never
+    pinned past this call.
+    """
+    def stack(columns, dtype):
+        arrays = [np.frombuffer(column, dtype=dtype) for column in columns if column]
+        stacked = np.concatenate(arrays) if arrays else np.empty(0, dtype=dtype)
+        del arrays
+        return stacked
+
+    offsets = np.zeros(len(histories) + 1, dtype=np.int64)
+    np.cumsum([len(history.prices) for history in histories], out=offsets[1:])
+    rollup_offsets = np.zeros(len(histories) + 1, dtype=np.int64)
+    np.cumsum([len(history.buckets) for history in histories], out=rollup_offsets[1:])
+    return (offsets,
+            stack([history.timestamps for history in histories], np.int64),
+            stack([history.prices for history in histories], np.float64),
+            rollup_offsets,
+            stack([history.buckets for history in histories], np.int64),
+            stack([history.lows for history in histories], np.float64),
+            stack([history.highs for history in histories], np.float64),
+            stack([history.lasts for history in histories], np.float64))
+
+
+def daily_closes(offsets, timestamps, prices, rollup_offsets, buckets, lasts):
+    """(rows, days, closes): the last price of every product and day across both tiers, unordered"""
+    count = len(offsets) - 1
+    rows = np.repeat(np.arange(count), np.diff(offsets))
+    days = timestamps // DAY
+    # Points are in time order per product, so a day closes where the next point is another day or product
+    last = np.ones(len(rows), dtype=bool)
+    last[:-1] = (rows[1:] != rows[:-1]) | (days[1:] != days[:-1])
+
+    # A day split between the tiers closes with its recent points
+    rollup_rows = np.repeat(np.arange(count), np.diff(rollup_offsets))
+    rollup_days = buckets // DAY
+    first_day = np.full(count, -1, dtype=np.int64)
+    nonempty = np.diff(offsets) > 0
+    first_day[nonempty] = days[offsets[:-1][nonempty]]
+    kept = rollup_days != first_day[rollup_rows]
+    return (np.concatenate([rollup_rows[kept], rows[last]]),
+            np.concatenate([rollup_days[kept], days[last]]),
+            np.concatenate([lasts[kept], prices[last]]))
+
+
+class CatalogueAnalytics:
+    """Price statistics for every tracked product, computed in one vectorised pass
+
+    Each statistic is a NumPy array aligned with ids (NaN where a product has
+    no data): current and target price, all-time low and high, 7/30-day moving
+    averages and 30/90-day medians of daily closing prices, how far the current
+    price is below each median, drop events (falls of DROP_THRESHOLD or more
+    between consecutive observations) with the time and size of the latest,
+    and a 0-100 deal score. The object is an immutable snapshot, so front ends
+    can read it from any thread.
+    """
+
+    def __init__(self, ids, columns, computed_at):
+        self.ids = ids
+        self.columns = columns
+        self.computed_at = computed_at
+        self.positions = dict(zip(ids.tolist(), range(len(ids))))
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __getitem__(self, column):
+        return self.columns[column]
+
+    @classmethod
+    def build(cls, products, now=None):
+        """Analyse products (dicts with price_history); the caller keeps them from changing meanwhile"""
+        now = time.time() if now is None else now
+        count = len(products)
+        ids = np.fromiter((product['id'] for product in products), dtype=np.int64, count=count)
+        current = np.fromiter((product['current_price'] or np.nan for product in products), dtype=np.float64, count=count)
+        target = np.fromiter((product['target_price'] for product in products), dtype=np.float64, count=count)
+        (offsets, timestamps, prices, rollup_offsets,
+         buckets, lows, highs, lasts) = stack_histories([product['price_history'] for product in products])
+
+        low = np.fmin(segment_reduce(np.minimum, prices, offsets, np.nan),
+                      segment_reduce(np.minimum, lows, rollup_offsets, np.nan))
+        high = np.fmax(segment_reduce(np.maximum, prices, offsets, np.nan),
+                       segment_reduce(np.maximum, highs, rollup_offsets, np.nan))
+
+        columns = {'current': current, 'target': target, 'low': low, 'high': high}
+        rows, days, closes = daily_closes(offsets, timestamps, prices, rollup_offsets, buckets, lasts)
+        today = int(now) // DAY
+        for window in MOVING_AVERAGE_DAYS:
+            recent = days > today - window
+            columns[f'ma{window}'] = segment_mean(closes[recent], rows[recent], count)
+        # One sort by (product, price) serves every median window
+        order = np.lexsort((closes, rows))
+        rows, days, closes = rows[order], days[order], closes[order]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            for window in MEDIAN_DAYS:
+                recent = days > today - window
+                median = segment_median(closes[recent], rows[recent], count)
+                columns[f'median{window}'] = median
+                columns[f'below{window}'] = (median - current) / median
+
+            # Drops between consecutive full-resolution observations of the same product
+            point_rows = np.repeat(np.arange(count), np.diff(offsets))
+            change = np.zeros(len(prices))
+            change[1:] = prices[1:] / prices[:-1] - 1
+            drop = change <= -DROP_THRESHOLD
+            drop[offsets[:-1][np.diff(offsets) > 0]] = False
+        events = np.flatnonzero(drop)
+        columns['drops'] = np.bincount(point_rows[events], minlength=count)
+        latest = events[np.append(point_rows[events][1:] != point_rows[events][:-1], True)] if events.size else events
+        columns['last_drop_at'] = np.full(count, np.nan)
+        columns['last_drop'] = np.full(count, np.nan)
+        columns['last_drop_at'][point_rows[latest]] = timestamps[latest]
+        columns['last_drop'][point_rows[latest]] = -change[latest]
+
+        # Deal score: 40% for nearness to the all-time low, 40% for the discount
+        # to the 90-day median, 20% for being at or under the target price
+        with np.errstate(invalid='ignore', divide='ignore'):
+            span = high - low
+            range_position = np.where(span > 0, (high - current) / span, 0.5)
+            discount = np.clip(np.nan_to_num(columns['below90']) / DEAL_DISCOUNT, 0, 1)
+            score = 100 * (0.4 * np.clip(range_position, 0, 1) + 0.4 * discount + 0.2 * (current <= target))
+        columns['score'] = np.where(np.isnan(current), np.nan, np.round(score, 1))
+        return cls(ids, columns, now)
+
+    def row(self, product_id):
+        """{column: value} for one product (None for missing values), or None if not analysed"""
+        position = self.positions.get(product_id)
+        if position is None:
+            return None
+        return {column: None if np.isnan(value) else value.item()
+                for column, value in ((column, self.columns[column][position]) for column in COLUMNS)}
+
+    def top_deals(self, count=10):
+        """Product ids with the highest deal scores, best first"""
+        score = self.columns['score']
+        priced = np.flatnonzero(~np.isnan(score))
+        best = priced[np.argsort(-score[priced], kind='stable')[:count]]
+        return self.ids[best].tolist()
+
+    def summary(self):
+        """One-line overview of the catalogue"""
+        priced = ~np.isnan(self.columns['current'])
+        at_low = priced & (self.columns['current'] <= self.columns['low'])
+        below = priced & (self.columns['below30'] > 0)
+        return (f"{int(priced.sum())}/{len(self)} products priced, {int(at_low.sum())} at their all-time low, "
+                f"{int(below.sum())} below their 30-day median, {int(self.columns['drops'].sum())} drops recorded")
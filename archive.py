@@ -0,0 +1,161 @@
+import gzip
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+ARCHIVE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS pages (
+    key TEXT NOT NULL,
+    url TEXT NOT NULL,
+    ts INTEGER NOT NULL,
+    hash TEXT NOT NULL,
+    price REAL,
+    tier TEXT,
+    selector TEXT,
+    PRIMARY KEY (key, ts)
+);
+CREATE INDEX IF NOT EXISTS pages_hash ON pages (hash);
+CREATE TABLE IF NOT EXISTS blobs (
+    hash TEXT PRIMARY KEY,
+    codec TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    stored INTEGER NOT NULL,
+    last_seen INTEGER NOT NULL
+);
+"""
+
+EXTENSIONS = {'zstd': '.zst', 'gzip': '.gz'}
+EVICT_EVERY = 3600
+
+# An archived page and a recorded observation this many seconds apart belong to the same check
+MATCH_WINDOW = 120
+
+
+def compress(body, codec):
+    if codec == 'zstd':
+        return zstandard.ZstdCompressor(level=10).compress(body)
+    return gzip.compress(body, compresslevel=6)
+
+
+def decompress(data, codec):
+    if codec == 'zstd':
+        if zstandard is None:
+            raise RuntimeError("page was archived with zstd, which is not installed")
+        return zstandard.ZstdDecompressor().decompress(data)
+    return gzip.decompress(data)
+
+
+class PageArchive:
+    """Compressed, content-deduplicated store of fetched page bodies
+
+    Each fetch is indexed by fetch key (one retailer item, shared by every
+    product showing it) and epoch timestamp, together with what was extracted
+    from it at the time. Identical bodies are stored once. Pages older than
+    max_age are dropped, and when the blobs outgrow max_bytes the least
+    recently seen ones go first.
+    """
+
+    def __init__(self, directory, max_bytes=512 * 1024 * 1024, max_age=30 * 86400, codec='auto'):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        if codec == 'auto':
+            codec = 'zstd' if zstandard is not None else 'gzip'
+        self.codec = codec
+        self.evicted_at = 0
+        os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(os.path.join(directory, 'archive.db'), check_same_thread=False)
+        self.lock = threading.Lock()
+        with self.lock:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("PRAGMA synchronous=NORMAL")
+            self.conn.executescript(ARCHIVE_SCHEMA)
+
+    def blob_path(self, digest, codec):
+        return os.path.join(self.directory, digest[:2], digest + EXTENSIONS[codec])
+
+    def add(self, key, url, body, price=None, tier=None, selector=None, timestamp=None):
+        """Archive one fetched body and the extraction result it gave"""
+        timestamp = int(time.time() if timestamp is None else timestamp)
+        digest = hashlib.sha1(body).hexdigest()
+        with self.lock:
+            known = self.conn.execute("SELECT 1 FROM blobs WHERE hash = ?", (digest,)).fetchone()
+        if not known:
+            data = compress(body, self.codec)
+            path = self.blob_path(digest, self.codec)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path + '.tmp', 'wb') as f:
+                f.write(data)
+            os.replace(path + '.tmp', path)
+
+        with self.lock, self.conn:
+            if known:
+                self.conn.execute("UPDATE blobs SET last_seen = MAX(last_seen, ?) WHERE hash = ?", (timestamp, digest))
+            else:
+                self.conn.execute("INSERT OR REPLACE INTO blobs (hash, codec, size, stored, last_seen) VALUES (?, ?, ?, ?, ?)",
+                                  (digest, self.codec, len(body), len(data), timestamp))
+            self.conn.execute("INSERT OR REPLACE INTO pages (key, url, ts, hash, price, tier, selector) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                              (key, url, timestamp, digest, price, tier, selector))
+        if time.time() - self.evicted_at > EVICT_EVERY:
+            self.evict()
+
+    def pages(self):
+        """All archived fetches as (key, url, ts, hash, price, tier, selector), oldest first"""
+        with self.lock:
+            return self.conn.execute(
+                "SELECT key, url, ts, hash, price, tier, selector FROM pages ORDER BY ts").fetchall()
+
+    def read(self, digest):
+        """The original body for a blob hash"""
+        with self.lock:
+            row = self.conn.execute("SELECT codec FROM blobs WHERE hash = ?", (digest,)).fetchone()
+        if row is None:
+            raise KeyError(digest)
+        with open(self.blob_path(digest, row[0]), 'rb') as f:
+            return decompress(f.read(), row[0])
+
+    def evict(self, now=None):
+        """Drop pages past max_age, then least recently seen blobs beyond max_bytes"""
+        now = time.time() if now is None else now
+        with self.lock:
+            with self.conn:
+                self.conn.execute("DELETE FROM pages WHERE ts < ?", (int(now - self.max_age),))
+                doomed = self.conn.execute(
+                    "SELECT hash, codec FROM blobs WHERE hash NOT IN (SELECT hash FROM pages)").fetchall()
+                total = self.conn.execute(
+                    "SELECT COALESCE(SUM(stored), 0) FROM blobs WHERE hash IN (SELECT hash FROM pages)").fetchone()[0]
+                if total > self.max_bytes:
+                    for digest, codec, stored in self.conn.execute(
+                            "SELECT hash, codec, stored FROM blobs WHERE hash IN (SELECT hash FROM pages) "
+                            "ORDER BY last_seen").fetchall():
+                        if total <= self.max_bytes:
+                            break
+                        doomed.append((digest, codec))
+                        total -= stored
+                self.conn.executemany("DELETE FROM pages WHERE hash = ?", [(digest,) for digest, _ in doomed])
+                self.conn.executemany("DELETE FROM blobs WHERE hash = ?", [(digest,) for digest, _ in doomed])
+            self.evicted_at = time.time()
+        for digest, codec in doomed:
+            try:
+                os.remove(self.blob_path(digest, codec))
+            except FileNotFoundError:
+                pass
+        return len(doomed)
+
+    def stats(self):
+        """(archived fetches, distinct bodies, compressed bytes on disk)"""
+        with self.lock:
+            pages = self.conn.execute("SELECT COUNT(*) FROM pages").fetchone()[0]
+            blobs, stored = self.conn.execute("SELECT COUNT(*), COALESCE(SUM(stored), 0) FROM blobs").fetchone()
+        return pages, blobs, stored
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
@@ -0,0 +1,108 @@
+"""Extraction throughput on the saved fixture corpus.
+
+Usage:
+    python benchmarks/bench_extract.py [--repeat N] [--output results.json]
+
+Runs the full tiered extraction (structured data, then site and generic
+selectors) on every page in benchmarks/fixtures with each parser backend and
+reports pages/sec, then the cost of every selector on a parsed page. Prices
+are checked against fixtures/expected.json; any mismatch fails the run.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from extractors import (available_backends, extract_structured_price, extract_dom_price,  # noqa: E402
+                        parse_document, GENERIC_SELECTORS)
+from site_profiles import SiteRegistry  # noqa: E402
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+
+def load_corpus(directory=FIXTURES):
+    """[(name, body, expected)] for the pages listed in expected.json"""
+    with open(os.path.join(directory, 'expected.json'), 'r') as f:
+        expected = json.load(f)
+    corpus = []
+    for name, want in expected.items():
+        with open(os.path.join(directory, name), 'rb') as f:
+            corpus.append((name, f.read(), want))
+    return corpus
+
+
+def extract(body, profile, backend, scoped):
+    price, tier = extract_structured_price(body)
+    if price is None:
+        price, tier = extract_dom_price(body, profile, backend, scoped)
+    return price, tier
+
+
+def time_extraction(body, profile, backend, scoped, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        price, tier = extract(body, profile, backend, scoped)
+    return (time.perf_counter() - start) / repeat, price, tier
+
+
+def time_selector(document, selector, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        matches = sum(1 for _ in document.select(selector))
+    return (time.perf_counter() - start) / repeat, matches
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--output', help='write results as JSON to this file')
+    args = parser.parse_args()
+
+    registry = SiteRegistry.load()
+    variants = [(backend, False) for backend in available_backends()]
+    variants += [(backend, True) for backend in available_backends() if backend != 'lexbor']
+
+    results = []
+    failures = 0
+    print(f"{'page':24} {'backend':22} {'ms/page':>9} {'pages/s':>9} {'price':>9}  tier")
+    for name, body, want in load_corpus():
+        profile = registry.get(name.split('_')[0])
+        for backend, scoped in variants:
+            seconds, price, tier = time_extraction(body, profile, backend, scoped, args.repeat)
+            ok = price == want['price'] and tier == want['tier']
+            failures += not ok
+            label = backend + (' (scoped)' if scoped else '')
+            print(f"{name:24} {label:22} {seconds * 1000:9.3f} {1 / seconds:9.0f} {str(price):>9}  {tier}"
+                  + ("" if ok else f"   !! expected {want['price']} ({want['tier']})"))
+            results.append({'page': name, 'backend': backend, 'scoped': scoped, 'bytes': len(body),
+                            'seconds_per_page': seconds, 'pages_per_second': 1 / seconds,
+                            'price': price, 'tier': tier, 'ok': ok})
+
+    selectors = []
+    print(f"\n{'page':24} {'backend':12} {'ms':>8} {'hits':>5}  selector")
+    for name, body, _ in load_corpus():
+        profile = registry.get(name.split('_')[0])
+        candidates = (profile.selectors if profile else []) + GENERIC_SELECTORS
+        for backend in available_backends():
+            document = parse_document(body, backend)
+            for selector in candidates:
+                seconds, matches = time_selector(document, selector, args.repeat)
+                print(f"{name:24} {backend:12} {seconds * 1000:8.3f} {matches:5}  {selector.css}")
+                selectors.append({'page': name, 'backend': backend, 'selector': selector.css,
+                                  'seconds': seconds, 'matches': matches})
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'benchmark': 'extract', 'python': platform.python_version(), 'repeat': args.repeat,
+                       'results': results, 'selectors': selectors, 'failures': failures}, f, indent=2)
+
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
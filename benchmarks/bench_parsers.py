@@ -0,0 +1,86 @@
+"""Compare HTML parser backends on the same product pages.
+
+Usage:
+    python benchmarks/bench_parsers.py [--repeat N] [page.html ...]
+
+The site profile of each page is taken from its file name (e.g. amazon_tv.html).
+Without arguments a set of synthetic retailer pages is used. Every backend,
+full and scoped, must return the same price for a page or the run fails.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from extractors import available_backends, extract_dom_price  # noqa: E402
+from site_profiles import SiteRegistry  # noqa: E402
+
+FILLER = '<div class="row"><a href="/p/%d">Related item %d</a><p>Lorem ipsum dolor sit amet.</p></div>'
+
+
+def synthetic_page(price_html, rows=3000):
+    """A large page with the price block buried in the middle"""
+    filler = [FILLER % (i, i) for i in range(rows)]
+    filler.insert(rows // 2, price_html)
+    return ('<html><head><title>Product</title></head><body>' + ''.join(filler) + '</body></html>').encode()
+
+
+def synthetic_pages():
+    return {
+        'amazon_synthetic.html': synthetic_page(
+            '<div id="corePrice_feature_div"><span class="a-price"><span class="a-offscreen">$249.99</span></span></div>'),
+        'ebay_synthetic.html': synthetic_page(
+            '<div data-testid="x-price-primary"><span class="notranslate">US $89.50</span></div>'),
+        'daraz_synthetic.html': synthetic_page(
+            '<div class="pdp-product-price"><span class="pdp-price">Rs. 1,499</span></div>'),
+        'generic_synthetic.html': synthetic_page('<span class="product-price">$12.00</span>')
+    }
+
+
+def time_backend(body, profile, backend, scoped, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        price, tier = extract_dom_price(body, profile, backend, scoped)
+    return (time.perf_counter() - start) / repeat, price
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('pages', nargs='*', help='saved product pages')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    if args.pages:
+        pages = {}
+        for path in args.pages:
+            with open(path, 'rb') as f:
+                pages[os.path.basename(path)] = f.read()
+    else:
+        pages = synthetic_pages()
+
+    variants = [(backend, False) for backend in available_backends()]
+    variants += [(backend, True) for backend in available_backends() if backend != 'lexbor']
+
+    registry = SiteRegistry.load()
+    mismatches = 0
+    print(f"{'page':32} {'backend':22} {'ms/page':>9} {'price':>10}")
+    for name, body in pages.items():
+        profile = registry.get(name.split('_')[0])
+        prices = set()
+        for backend, scoped in variants:
+            seconds, price = time_backend(body, profile, backend, scoped, args.repeat)
+            prices.add(price)
+            label = backend + (' (scoped)' if scoped else '')
+            print(f"{name:32} {label:22} {seconds * 1000:9.2f} {str(price):>10}")
+        if len(prices) != 1:
+            mismatches += 1
+            print(f"!! backends disagree on {name}: {sorted(prices, key=str)}")
+
+    if mismatches:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+"""End-to-end sweep benchmark against the local stub server.
+
+Usage:
+    python benchmarks/bench_sweep.py [--products N] [--sweeps N] [--latency MS]
+                                     [--error-rate R] [--no-etag] [--output results.json]
+
+Creates a throwaway database of products spread over Amazon, eBay, Daraz and
+generic shop URLs, routes all traffic to benchmarks/stub_server.py through
+HTTP_PROXY (no network access needed) and times full check_all_products()
+sweeps. The first sweep downloads every page; later ones exercise the 304 and
+unchanged-region paths. Reports sweep time, products/sec, requests, 304s,
+errors and how many products ended up with the expected price.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from stub_server import StubServer, FIXTURES  # noqa: E402
+from fetcher import HostRateLimiter  # noqa: E402
+from price_history import PriceHistory  # noqa: E402
+from storage import ProductStore  # noqa: E402
+from tracker_core import TrackerEngine  # noqa: E402
+
+URL_PATTERNS = [
+    ('amazon_product.html', 'http://www.amazon.com/Product-{i}/dp/B{i:09d}?ref=sr_1_{i}'),
+    ('ebay_item.html', 'http://www.ebay.com/itm/{id}'),
+    ('daraz_product.html', 'http://www.daraz.pk/products/item-i{id}-s{i}.html'),
+    ('generic_jsonld.html', 'http://shop{i}.example.com/generic_jsonld.html'),
+    ('generic_meta.html', 'http://shop{i}.example.com/generic_meta.html'),
+    ('generic_dom.html', 'http://shop{i}.example.com/generic_dom.html'),
+]
+
+
+def create_products(db_file, count):
+    """Fill a fresh database; return {url: expected price}"""
+    with open(os.path.join(FIXTURES, 'expected.json'), 'r') as f:
+        expected = json.load(f)
+    store = ProductStore(db_file)
+    prices = {}
+    for i in range(count):
+        fixture, pattern = URL_PATTERNS[i % len(URL_PATTERNS)]
+        url = pattern.format(i=i, id=100000000 + i)
+        store.add({'name': f"{fixture.split('.')[0]} {i}", 'url': url, 'target_price': 0.01,
+                   'current_price': None, 'last_checked': None, 'alerts_sent': 0,
+                   'price_history': PriceHistory()})
+        prices[url] = expected[fixture]['price']
+    store.commit()
+    store.close()
+    return prices
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--products', type=int, default=60)
+    parser.add_argument('--sweeps', type=int, default=2)
+    parser.add_argument('--latency', type=float, default=50, help='stub latency in milliseconds')
+    parser.add_argument('--error-rate', type=float, default=0, help='fraction of requests answered with 503')
+    parser.add_argument('--no-etag', action='store_true', help='stub never answers 304')
+    parser.add_argument('--delay', type=float, default=0, help='per-host delay between requests in seconds')
+    parser.add_argument('--parse-workers', type=int, help='parser processes (default: one per CPU)')
+    parser.add_argument('--verbose', action='store_true', help='print the engine log')
+    parser.add_argument('--output', help='write results as JSON to this file')
+    args = parser.parse_args()
+    output = os.path.abspath(args.output) if args.output else None
+
+    server = StubServer(latency=args.latency / 1000, error_rate=args.error_rate, etags=not args.no_etag).start()
+    # Send every http:// request through the stub, whatever its host
+    for name in ('NO_PROXY', 'no_proxy'):
+        os.environ.pop(name, None)
+    os.environ['HTTP_PROXY'] = os.environ['http_proxy'] = server.url
+
+    workdir = tempfile.mkdtemp(prefix='bench_sweep_')
+    os.chdir(workdir)
+    expected = create_products('bench.db', args.products)
+
+    engine = TrackerEngine(db_file='bench.db', data_file='none.json',
+                           log=print if args.verbose else None)
+    engine.rate_limiter = engine.fetch_engine.rate_limiter = HostRateLimiter(delay=args.delay)
+    if args.parse_workers is not None:
+        engine.parser_pool.workers = args.parse_workers
+
+    sweeps = []
+    print(f"{'sweep':>5} {'seconds':>8} {'products/s':>10} {'requests':>8} {'304':>5} {'errors':>6} {'correct':>8}")
+    try:
+        for sweep in range(args.sweeps):
+            server.reset_stats()
+            start = time.perf_counter()
+            engine.check_all_products()
+            seconds = time.perf_counter() - start
+            stats = server.reset_stats()
+            correct = sum(1 for product in engine.products if product['current_price'] == expected[product['url']])
+            print(f"{sweep + 1:5} {seconds:8.2f} {args.products / seconds:10.1f} {stats.get('requests', 0):8} "
+                  f"{stats.get('not_modified', 0):5} {stats.get('errors', 0):6} {correct:5}/{args.products}")
+            sweeps.append({'sweep': sweep + 1, 'seconds': seconds, 'products_per_second': args.products / seconds,
+                           'requests': stats.get('requests', 0), 'not_modified': stats.get('not_modified', 0),
+                           'errors': stats.get('errors', 0), 'correct': correct})
+    finally:
+        engine.close()
+        server.shutdown()
+
+    if output:
+        with open(output, 'w') as f:
+            json.dump({'benchmark': 'sweep', 'python': platform.python_version(), 'products': args.products,
+                       'latency_ms': args.latency, 'error_rate': args.error_rate, 'etags': not args.no_etag,
+                       'sweeps': sweeps}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,115 @@
+"""Multi-worker throughput against the local stub server.
+
+Usage:
+    python benchmarks/bench_workers.py [--products N] [--workers 1,2,4] [--latency MS]
+                                       [--kill-after S] [--output results.json]
+
+For each worker count, creates a fresh database of products (see
+bench_sweep.py), routes traffic to benchmarks/stub_server.py through
+HTTP_PROXY and runs `main.py --headless --workers N --once` as a real process
+fleet sharing the database as a work queue. Reports wall time, products/sec,
+requests served (each product should be fetched once) and how many products
+ended up with the expected price. --kill-after S kills one worker S seconds
+in (and shortens leases to 5 s) to show its products being picked up again.
+"""
+import argparse
+import json
+import os
+import platform
+import signal
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from stub_server import StubServer  # noqa: E402
+from bench_sweep import create_products  # noqa: E402
+
+
+def worker_pids(parent):
+    """Process ids of parent's --workers processes (Linux /proc)"""
+    pids = []
+    for entry in os.listdir('/proc'):
+        if entry.isdigit():
+            try:
+                with open(f'/proc/{entry}/stat', 'r') as f:
+                    ppid = int(f.read().rsplit(')', 1)[1].split()[1])
+                with open(f'/proc/{entry}/cmdline', 'rb') as f:
+                    # Skip multiprocessing's resource tracker
+                    spawned = b'spawn_main' in f.read()
+            except (OSError, ValueError, IndexError):
+                continue
+            if ppid == parent and spawned:
+                pids.append(int(entry))
+    return pids
+
+
+def run_fleet(workers, args, env):
+    command = [sys.executable, os.path.join(ROOT, 'main.py'), '--headless', '--db', 'bench.db', '--once',
+               '--workers', str(workers), '--request-delay', '0', '--parse-workers', '0']
+    if args.kill_after:
+        command += ['--lease', '5']
+    start = time.perf_counter()
+    fleet = subprocess.Popen(command, env=env, stdout=None if args.verbose else subprocess.DEVNULL)
+    if args.kill_after:
+        time.sleep(args.kill_after)
+        pids = worker_pids(fleet.pid)
+        if pids:
+            os.kill(pids[0], signal.SIGKILL)
+            print(f"  killed worker {pids[0]}")
+    fleet.wait()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--products', type=int, default=600)
+    parser.add_argument('--workers', default='1,2,4', help='comma-separated worker counts to compare')
+    parser.add_argument('--latency', type=float, default=100, help='stub latency in milliseconds')
+    parser.add_argument('--kill-after', type=float, help='SIGKILL one worker this many seconds into each run')
+    parser.add_argument('--verbose', action='store_true', help='show the workers\' log')
+    parser.add_argument('--output', help='write results as JSON to this file')
+    args = parser.parse_args()
+    output = os.path.abspath(args.output) if args.output else None
+
+    server = StubServer(latency=args.latency / 1000, etags=False).start()
+    env = dict(os.environ, HTTP_PROXY=server.url, http_proxy=server.url)
+    for name in ('NO_PROXY', 'no_proxy'):
+        env.pop(name, None)
+
+    workdir = tempfile.mkdtemp(prefix='bench_workers_')
+    os.chdir(workdir)
+
+    runs = []
+    print(f"{'workers':>7} {'seconds':>8} {'products/s':>10} {'requests':>8} {'correct':>9}")
+    try:
+        for workers in [int(count) for count in args.workers.split(',')]:
+            if os.path.exists('bench.db'):
+                os.remove('bench.db')
+            expected = create_products('bench.db', args.products)
+            server.reset_stats()
+            seconds = run_fleet(workers, args, env)
+            stats = server.reset_stats()
+            with sqlite3.connect('bench.db') as conn:
+                prices = conn.execute("SELECT url, current_price FROM products").fetchall()
+            correct = sum(1 for url, price in prices if price == expected[url])
+            print(f"{workers:7} {seconds:8.2f} {args.products / seconds:10.1f} {stats.get('requests', 0):8} "
+                  f"{correct:5}/{args.products}")
+            runs.append({'workers': workers, 'seconds': seconds, 'products_per_second': args.products / seconds,
+                         'requests': stats.get('requests', 0), 'correct': correct})
+    finally:
+        server.shutdown()
+
+    if output:
+        with open(output, 'w') as f:
+            json.dump({'benchmark': 'workers', 'python': platform.python_version(), 'products': args.products,
+                       'latency_ms': args.latency, 'runs': runs}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,151 @@
+"""Local HTTP stub that serves the fixture corpus in place of real retailers.
+
+Usage:
+    python benchmarks/stub_server.py [--port N] [--latency MS] [--error-rate R] [--no-etag]
+
+The stub also works as a plain HTTP proxy, so http://www.amazon.com/dp/...
+URLs reach it (set HTTP_PROXY) and keep their real host for site profiles.
+The page served is chosen by the registered domain of the requested host
+(amazon_*, ebay_*, daraz_* fixtures) or, for any other host, by the fixture
+named in the path (/generic_dom.html). Every response carries an ETag, so
+repeat requests with If-None-Match get 304 unless --no-etag is given.
+"""
+import argparse
+import hashlib
+import os
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from site_profiles import registered_domain  # noqa: E402
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+
+def load_fixtures(directory=FIXTURES):
+    """{file name: bytes} for every saved page in directory"""
+    pages = {}
+    for name in sorted(os.listdir(directory)):
+        if name.endswith('.html'):
+            with open(os.path.join(directory, name), 'rb') as f:
+                pages[name] = f.read()
+    return pages
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        server = self.server
+        parts = urlparse(self.path)
+        host = parts.hostname or self.headers.get('Host', '').split(':')[0]
+        name = server.page_for(host, parts.path)
+        server.count('requests')
+
+        delay = server.latency * random.uniform(1 - server.jitter, 1 + server.jitter)
+        if delay > 0:
+            time.sleep(delay)
+
+        if name is None:
+            server.count('not_found')
+            return self.reply(404, b'not found')
+        if random.random() < server.error_rate:
+            server.count('errors')
+            return self.reply(503, b'unavailable')
+
+        body = server.pages[name]
+        etag = '"%s"' % hashlib.sha1(body).hexdigest()[:16]
+        if server.etags and self.headers.get('If-None-Match') == etag:
+            server.count('not_modified')
+            return self.reply(304, b'', etag)
+        server.count('ok')
+        self.reply(200, body, etag if server.etags else None)
+
+    def reply(self, status, body, etag=None):
+        self.send_response(status)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        if etag:
+            self.send_header('ETag', etag)
+        self.end_headers()
+        try:
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+
+class StubServer(ThreadingHTTPServer):
+    """Threaded stub with configurable latency (seconds), jitter, 503 rate and ETags"""
+
+    daemon_threads = True
+
+    def __init__(self, port=0, pages=None, latency=0.0, jitter=0.5, error_rate=0.0, etags=True):
+        super().__init__(('127.0.0.1', port), StubHandler)
+        self.pages = load_fixtures() if pages is None else pages
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.etags = etags
+        self.lock = threading.Lock()
+        self.stats = {}
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def page_for(self, host, path):
+        retailer = registered_domain(host).split('.')[0] if host else ''
+        if retailer in ('amazon', 'ebay', 'daraz'):
+            for name in self.pages:
+                if name.startswith(retailer + '_'):
+                    return name
+        name = os.path.basename(path)
+        return name if name in self.pages else None
+
+    def handle_error(self, request, client_address):
+        # Streaming clients reset the connection once they have the price
+        if not isinstance(sys.exc_info()[1], (ConnectionResetError, BrokenPipeError)):
+            super().handle_error(request, client_address)
+
+    def count(self, key):
+        with self.lock:
+            self.stats[key] = self.stats.get(key, 0) + 1
+
+    def reset_stats(self):
+        """Return the counters so far and start new ones"""
+        with self.lock:
+            stats, self.stats = self.stats, {}
+        return stats
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--port', type=int, default=8800)
+    parser.add_argument('--latency', type=float, default=0, help='milliseconds added to every response')
+    parser.add_argument('--error-rate', type=float, default=0, help='fraction of requests answered with 503')
+    parser.add_argument('--no-etag', action='store_true', help='never answer 304')
+    args = parser.parse_args()
+
+    server = StubServer(args.port, latency=args.latency / 1000, error_rate=args.error_rate,
+                        etags=not args.no_etag)
+    print(f"Serving {len(server.pages)} fixtures on {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
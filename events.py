@@ -0,0 +1,25 @@
+import queue
+
+
+class EventBus:
+    """Thread-safe queue of (kind, payload) events
+
+    Worker threads post events; the UI thread drains them in batches on a
+    timer, so widgets are only ever touched from the thread that owns them.
+    """
+
+    def __init__(self):
+        self.queue = queue.SimpleQueue()
+
+    def post(self, kind, payload=None):
+        self.queue.put((kind, payload))
+
+    def drain(self, limit=1000):
+        """Return up to limit queued events without blocking"""
+        events = []
+        try:
+            while len(events) < limit:
+                events.append(self.queue.get_nowait())
+        except queue.Empty:
+            pass
+        return events
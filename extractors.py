@@ -0,0 +1,267 @@
+import json
+import re
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+try:
+    import lxml  # noqa: F401
+except ImportError:
+    lxml = None
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:
+    LexborHTMLParser = None
+
+from site_profiles import CompiledSelector, DEFAULT_PRICE_PATTERN
+
+# Structured sources retailers embed for search engines; all scanned on raw bytes
+JSON_LD_RE = re.compile(rb'<script[^>]+application/ld\+json[^>]*>(.*?)</script>', re.S | re.I)
+META_RE = re.compile(rb'<meta[^>]+(?:og|product):price:amount[^>]*>', re.I)
+ITEMPROP_RE = re.compile(rb'<[a-z]+[^>]+itemprop=["\']price["\'][^>]*>([^<]*)', re.I)
+CONTENT_RE = re.compile(rb'content=["\']([^"\']+)["\']', re.I)
+NUMBER_RE = re.compile(r'\d[\d,]*\.?\d*')
+
+
+def parse_amount(value):
+    """Turn a price value like '1,299.00' or 1299 into a positive float, or None"""
+    if isinstance(value, (int, float)):
+        return float(value) if value > 0 else None
+    if isinstance(value, bytes):
+        value = value.decode('utf-8', 'ignore')
+    match = NUMBER_RE.search(str(value))
+    if not match:
+        return None
+    try:
+        price = float(match.group().replace(',', ''))
+    except ValueError:
+        return None
+    return price if price > 0 else None
+
+
+def iter_offers(data):
+    """Yield every Offer-like dict in a JSON-LD document"""
+    if isinstance(data, list):
+        for item in data:
+            yield from iter_offers(item)
+    elif isinstance(data, dict):
+        if 'price' in data or 'lowPrice' in data:
+            yield data
+        for key in ('offers', '@graph', 'mainEntity'):
+            if key in data:
+                yield from iter_offers(data[key])
+
+
+def price_from_json_ld(body):
+    for match in JSON_LD_RE.finditer(body):
+        try:
+            data = json.loads(match.group(1))
+        except ValueError:
+            continue
+        for offer in iter_offers(data):
+            price = parse_amount(offer.get('price', offer.get('lowPrice')))
+            if price:
+                return price
+    return None
+
+
+def price_from_meta(body):
+    for match in META_RE.finditer(body):
+        content = CONTENT_RE.search(match.group())
+        if content:
+            price = parse_amount(content.group(1))
+            if price:
+                return price
+    return None
+
+
+def price_from_microdata(body):
+    for match in ITEMPROP_RE.finditer(body):
+        content = CONTENT_RE.search(match.group())
+        price = parse_amount(content.group(1) if content else match.group(1))
+        if price:
+            return price
+    return None
+
+
+# Cheapest and most reliable structured sources first
+STRUCTURED_TIERS = [
+    ('json-ld', price_from_json_ld),
+    ('meta', price_from_meta),
+    ('microdata', price_from_microdata)
+]
+
+
+def extract_structured_price(body):
+    """Scan raw page bytes for a structured price; return (price, tier) or (None, None)"""
+    for tier, extractor in STRUCTURED_TIERS:
+        price = extractor(body)
+        if price:
+            return price, tier
+    return None, None
+
+
+GENERIC_SELECTORS = [CompiledSelector(css) for css in [
+    '[class*="price"]',
+    '[id*="price"]',
+    '.price',
+    '.cost',
+    '.amount',
+    '[data-price]'
+]]
+
+PRICE_TEXT_RE = re.compile(DEFAULT_PRICE_PATTERN)
+
+
+def price_from_text(text, price_re=PRICE_TEXT_RE):
+    """Pull the first positive number out of an element's text"""
+    match = price_re.search(text.strip().replace(',', '').replace('$', ''))
+    if match:
+        try:
+            price = float(match.group())
+            if price > 0:
+                return price
+        except ValueError:
+            pass
+    return None
+
+
+class SoupDocument:
+    """Selector interface over a BeautifulSoup tree"""
+
+    def __init__(self, body, parser, parse_only=None):
+        self.soup = BeautifulSoup(body, parser, parse_only=parse_only)
+
+    def select(self, selector):
+        """Yield (text, data-price attribute) for each element matching a CompiledSelector"""
+        for element in selector.compiled.select(self.soup):
+            yield element.get_text(), element.get('data-price')
+
+
+class LexborDocument:
+    """Selector interface over a selectolax/lexbor tree"""
+
+    def __init__(self, body):
+        self.tree = LexborHTMLParser(body)
+
+    def select(self, selector):
+        for node in self.tree.css(selector.css):
+            yield node.text(), node.attributes.get('data-price')
+
+
+def available_backends():
+    """Parser backends usable in this environment, fastest first"""
+    backends = []
+    if LexborHTMLParser is not None:
+        backends.append('lexbor')
+    if lxml is not None:
+        backends.append('lxml')
+    backends.append('html.parser')
+    return backends
+
+
+def resolve_backend(backend):
+    """Map 'auto' or an unavailable backend onto one that is installed"""
+    backends = available_backends()
+    if backend in backends:
+        return backend
+    return backends[0] if backend == 'auto' else 'html.parser'
+
+
+def parse_document(body, backend='html.parser', scope_re=None):
+    """Parse body with the given backend; scope_re limits bs4 parsing to matching class subtrees"""
+    if backend == 'lexbor':
+        return LexborDocument(body)
+    parse_only = SoupStrainer(class_=scope_re) if scope_re else None
+    return SoupDocument(body, backend, parse_only)
+
+
+def match_selectors(document, selectors, price_re):
+    """Try selectors in order; return (price, selector that hit, selectors that missed)"""
+    missed = []
+    for selector in selectors:
+        for text, _ in document.select(selector):
+            price = price_from_text(text, price_re)
+            if price:
+                return price, selector, missed
+        missed.append(selector)
+    return None, None, missed
+
+
+def match_generic_selectors(document):
+    for selector in GENERIC_SELECTORS:
+        for text, data_price in document.select(selector):
+            # Try data attribute first
+            if data_price:
+                try:
+                    price = float(data_price)
+                    if price > 0:
+                        return price
+                except ValueError:
+                    pass
+            price = price_from_text(text)
+            if price:
+                return price
+    return None
+
+
+def run_dom_tiers(body, profile, selectors=None, backend='html.parser', scoped=True):
+    """Site then generic selector tiers; return (price, tier, hit, missed)
+
+    hit and missed are the site selectors that found the price and those tried
+    before it, so callers can feed them back into a SiteRegistry. A hit in the
+    scoped pass reports no misses.
+    """
+    document = None
+    hit, missed = None, []
+    if profile is not None:
+        selectors = profile.selectors if selectors is None else selectors
+        price = None
+        # Cheap pass over only the subtrees the site selectors can match
+        if scoped and backend != 'lexbor' and profile.scope_re:
+            # Its misses prove nothing (the scoped tree lacks ancestors a selector may need),
+            # so only the full-document pass reports misses
+            price, hit, _ = match_selectors(parse_document(body, backend, profile.scope_re),
+                                            selectors, profile.price_re)
+        if not price:
+            document = parse_document(body, backend)
+            price, hit, missed = match_selectors(document, selectors, profile.price_re)
+        if price:
+            return price, 'site-selector', hit, missed
+
+    if document is None:
+        document = parse_document(body, backend)
+    price = match_generic_selectors(document)
+    if price:
+        return price, 'generic-selector', hit, missed
+    return None, None, hit, missed
+
+
+def partial_hit_holds(tier, hit_css, first_css):
+    """Whether a DOM price found in a cut-off page is the one the whole page would give
+
+    Only a hit of the first site selector tried holds: one tried before the hit
+    (or, for the generic tier, any site selector) may match past the cut, and
+    it would have won on the whole page.
+    """
+    return tier == 'site-selector' and hit_css is not None and hit_css == first_css
+
+
+def extract_dom_price(body, profile, backend='html.parser', scoped=True, registry=None, url=None, complete=True):
+    """Run the CSS selector tiers over a parsed page; return (price, tier)
+
+    With a registry and url, site selectors are tried in the order learned for
+    that domain and URL, and the outcome is fed back into the registry (only
+    the hit when the body is not the complete page). A price in a body that is
+    not the complete page is reported as a miss unless partial_hit_holds().
+    """
+    learn = profile is not None and registry is not None and url is not None
+    selectors = registry.ordered_selectors(profile, url) if learn else None
+    price, tier, hit, missed = run_dom_tiers(body, profile, selectors, backend, scoped)
+    if not complete and price is not None:
+        first = (selectors or profile.selectors)[0].css if profile is not None else None
+        if not partial_hit_holds(tier, hit.css if hit else None, first):
+            return None, None
+    if learn:
+        registry.record(profile, url, hit, missed if complete else [])
+    return price, tier
@@ -0,0 +1,308 @@
+import random
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ThreadPoolExecutor, wait, FIRST_COMPLETED
+from urllib.parse import urlparse
+
+
+def host_of(url):
+    """Return the lowercase host name of a URL"""
+    return (urlparse(url).hostname or '').lower()
+
+
+class TokenBucket:
+    """Thread-safe token bucket used to pace requests to one host"""
+
+    def __init__(self, rate, capacity=1):
+        self.rate = rate  # tokens per second
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def try_acquire(self):
+        """Take a token if one is available, otherwise return seconds until one is"""
+        with self.lock:
+            self._refill()
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0
+            return (1 - self.tokens) / self.rate
+
+    def acquire(self):
+        """Block until a token is available and take it"""
+        with self.lock:
+            self._refill()
+            # Reserve the token up front so concurrent callers queue up fairly
+            self.tokens -= 1
+            wait_time = -self.tokens / self.rate if self.tokens < 0 else 0
+        if wait_time > 0:
+            time.sleep(wait_time)
+
+
+class HostRateLimiter:
+    """Keeps one token bucket per host so every retailer gets polite traffic"""
+
+    def __init__(self, delay=2.0, burst=1):
+        self.rate = 1.0 / delay if delay > 0 else float('inf')
+        self.burst = burst
+        self.buckets = {}
+        self.lock = threading.Lock()
+
+    def bucket(self, host):
+        with self.lock:
+            bucket = self.buckets.get(host)
+            if bucket is None:
+                bucket = TokenBucket(self.rate, self.burst)
+                self.buckets[host] = bucket
+            return bucket
+
+    def try_acquire(self, url):
+        """Non-blocking acquire for the host of url (0 means go ahead)"""
+        if self.rate == float('inf'):
+            return 0
+        return self.bucket(host_of(url)).try_acquire()
+
+    def acquire(self, url):
+        """Wait until a request to the host of url is allowed"""
+        if self.rate == float('inf'):
+            return
+        self.bucket(host_of(url)).acquire()
+
+
+# Circuit breaker: consecutive failures that open a host's circuit, and how long it stays open
+FAILURE_THRESHOLD = 5
+OPEN_SECONDS = 5 * 60
+MAX_OPEN_SECONDS = 2 * 3600
+
+# Adaptive timeouts: a multiple of the host's p95 latency over recent requests, within bounds
+LATENCY_WINDOW = 50
+MIN_SAMPLES = 5
+TIMEOUT_FACTOR = 4
+MIN_TIMEOUT = 3
+MAX_TIMEOUT = 15
+
+CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half-open'
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of fetching from a host whose circuit is open"""
+
+    def __init__(self, host, retry_at):
+        super().__init__(f"{host} is failing, paused until {time.strftime('%H:%M:%S', time.localtime(retry_at))}")
+        self.host = host
+        self.retry_at = retry_at
+
+
+def backoff_delay(attempt, base=1.0, cap=30.0):
+    """Jittered exponential backoff before retry number attempt (0-based)"""
+    return min(cap, base * 2 ** attempt) * random.uniform(0.5, 1.5)
+
+
+class HostCircuit:
+    """Health of one host: breaker state, failure streak and recent latencies"""
+
+    def __init__(self):
+        self.state = CLOSED
+        self.failures = 0
+        self.open_for = OPEN_SECONDS
+        self.retry_at = 0
+        self.probing = False
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+
+
+class HostHealth:
+    """Per-host circuit breakers and latency-based timeouts
+
+    After FAILURE_THRESHOLD consecutive failures a host's circuit opens and
+    requests to it fail fast. Once the pause is over it goes half-open and a
+    single probe request is let through: success closes the circuit, failure
+    opens it again for twice as long (up to MAX_OPEN_SECONDS).
+    """
+
+    def __init__(self, log=None):
+        self.log_message = log or (lambda message: None)
+        self.circuits = {}
+        self.lock = threading.Lock()
+
+    def circuit(self, host):
+        circuit = self.circuits.get(host)
+        if circuit is None:
+            circuit = self.circuits[host] = HostCircuit()
+        return circuit
+
+    def available(self, url, now=None):
+        """Whether a request to url's host could go out now (does not claim the half-open probe)"""
+        now = time.time() if now is None else now
+        with self.lock:
+            circuit = self.circuit(host_of(url))
+            if circuit.state == OPEN:
+                return now >= circuit.retry_at
+            return not (circuit.state == HALF_OPEN and circuit.probing)
+
+    def allow(self, url, now=None):
+        """Claim permission to request url; raises CircuitOpenError if the host is paused"""
+        now = time.time() if now is None else now
+        host = host_of(url)
+        with self.lock:
+            circuit = self.circuit(host)
+            if circuit.state == OPEN and now >= circuit.retry_at:
+                circuit.state = HALF_OPEN
+                circuit.probing = False
+            if circuit.state == OPEN or (circuit.state == HALF_OPEN and circuit.probing):
+                raise CircuitOpenError(host, circuit.retry_at)
+            if circuit.state == HALF_OPEN:
+                circuit.probing = True
+
+    def retry_at(self, url):
+        """When a paused host accepts requests again (0 if it is not paused)"""
+        with self.lock:
+            circuit = self.circuit(host_of(url))
+            return circuit.retry_at if circuit.state != CLOSED else 0
+
+    def release_probe(self, url):
+        """Give up a claimed half-open probe without an outcome, so the next request probes instead"""
+        with self.lock:
+            self.circuit(host_of(url)).probing = False
+
+    def record_success(self, url, seconds):
+        host = host_of(url)
+        with self.lock:
+            circuit = self.circuit(host)
+            circuit.latencies.append(seconds)
+            recovered = circuit.state != CLOSED
+            circuit.state = CLOSED
+            circuit.failures = 0
+            circuit.probing = False
+            circuit.open_for = OPEN_SECONDS
+        if recovered:
+            self.log_message(f"🔌 {host} is responding again, circuit closed")
+
+    def record_failure(self, url, now=None):
+        now = time.time() if now is None else now
+        host = host_of(url)
+        with self.lock:
+            circuit = self.circuit(host)
+            circuit.failures += 1
+            if circuit.state == HALF_OPEN:
+                circuit.open_for = min(circuit.open_for * 2, MAX_OPEN_SECONDS)
+            elif circuit.state == OPEN or circuit.failures < FAILURE_THRESHOLD:
+                return
+            circuit.state = OPEN
+            circuit.probing = False
+            circuit.retry_at = now + circuit.open_for
+            failures, pause = circuit.failures, circuit.open_for
+        self.log_message(f"🔌 {host} failed {failures} times in a row, pausing it for {pause // 60:.0f} minutes")
+
+    def timeout_for(self, url):
+        """Request timeout for url's host: TIMEOUT_FACTOR x its p95 latency, clamped"""
+        with self.lock:
+            latencies = sorted(self.circuit(host_of(url)).latencies)
+        if len(latencies) < MIN_SAMPLES:
+            return MAX_TIMEOUT
+        p95 = latencies[int(0.95 * (len(latencies) - 1))]
+        return max(MIN_TIMEOUT, min(MAX_TIMEOUT, p95 * TIMEOUT_FACTOR))
+
+
+class RequestCoalescer:
+    """Lets concurrent callers with the same key share one in-flight call
+
+    The first caller for a key runs the function; callers arriving while it is
+    still running wait for and receive the same result (or exception).
+    """
+
+    def __init__(self):
+        self.in_flight = {}
+        self.lock = threading.Lock()
+
+    def run(self, key, func, *args):
+        with self.lock:
+            future = self.in_flight.get(key)
+            leader = future is None
+            if leader:
+                future = self.in_flight[key] = Future()
+        if not leader:
+            return future.result()
+
+        try:
+            result = func(*args)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self.lock:
+                del self.in_flight[key]
+
+
+class FetchEngine:
+    """Runs fetches on a bounded thread pool while honouring per-host rate limits
+
+    Items are queued per host and only handed to the pool once their host has a
+    token available, so workers never sit idle waiting on a slow retailer while
+    requests to other retailers could go out. With a HostHealth, the queue of a
+    host whose circuit is open is failed at once with CircuitOpenError.
+    """
+
+    def __init__(self, fetch_func, rate_limiter, max_workers=8, health=None, metrics=None):
+        self.fetch_func = fetch_func
+        self.rate_limiter = rate_limiter
+        self.max_workers = max_workers
+        self.health = health
+        self.metrics = metrics
+
+    def fetch(self, url, queued_at, profiler=None):
+        if self.metrics is not None:
+            self.metrics.observe('queue_wait_seconds', time.monotonic() - queued_at, host=host_of(url))
+        if profiler is not None:
+            return profiler.run(self.fetch_func, url)
+        return self.fetch_func(url)
+
+    def run(self, items, url_of=lambda item: item['url'], profiler=None):
+        """Fetch every item and yield (item, result, error) as fetches complete"""
+        queued_at = time.monotonic()
+        queues = OrderedDict()
+        for item in items:
+            queues.setdefault(host_of(url_of(item)), deque()).append(item)
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            in_flight = {}
+            while queues or in_flight:
+                next_ready = None
+                # Round-robin over hosts, dispatching every host that has a token
+                for host in list(queues):
+                    if len(in_flight) >= self.max_workers:
+                        break
+                    queue = queues[host]
+                    if self.health is not None and not self.health.available(url_of(queue[0])):
+                        error = CircuitOpenError(host, self.health.retry_at(url_of(queue[0])))
+                        del queues[host]
+                        for item in queue:
+                            yield item, None, error
+                        continue
+                    delay = self.rate_limiter.try_acquire(url_of(queue[0]))
+                    if delay:
+                        next_ready = delay if next_ready is None else min(next_ready, delay)
+                        continue
+                    item = queue.popleft()
+                    if not queue:
+                        del queues[host]
+                    in_flight[pool.submit(self.fetch, url_of(item), queued_at, profiler)] = item
+
+                if not in_flight:
+                    time.sleep(next_ready or 0)
+                    continue
+
+                done, _ = wait(in_flight, timeout=next_ready, return_when=FIRST_COMPLETED)
+                for future in done:
+                    item = in_flight.pop(future)
+                    error = future.exception()
+                    yield item, (None if error else future.result()), error
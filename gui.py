@@ -0,0 +1,549 @@
+import tkinter as tk
+from tkinter import ttk, messagebox, scrolledtext, filedialog
+import sqlite3
+import threading
+from datetime import datetime
+import webbrowser
+
+from tracker_core import TrackerEngine
+from events import EventBus
+from alerts import alert_summary
+
+class PriceTracker:
+    STATUSES = ("🎯 Target Reached!", "📊 Tracking", "❌ Error")
+    
+    def __init__(self, root):
+        self.root = root
+        self.root.title("Price Tracker Bot")
+        self.root.geometry("800x700")
+        self.root.configure(bg="#f0f0f0")
+        
+        # Variables
+        self.tracking_active = tk.BooleanVar(value=False)
+        self.check_interval = tk.IntVar(value=30)  # minutes
+        
+        # Products table: formatted rows cached by product id, shown one page at a time
+        self.rows = {}
+        self.shown = {}
+        self.page = 0
+        self.page_size = 200
+        self.sort_column = None
+        self.sort_reverse = False
+        
+        # Engine callbacks may run on worker threads, so they only post events;
+        # the Tk main loop drains them in batches
+        self.events = EventBus()
+        self.drain_interval = 100  # ms
+        self.max_events_per_tick = 2000
+        self.max_log_lines = 1000
+        
+        self.create_widgets()
+        
+        # All fetching, storage and alert logic lives in the tkinter-free engine
+        self.engine = TrackerEngine(log=self.log_message,
+                                    on_alert=lambda digest: self.events.post('alert', digest),
+                                    on_change=lambda changed=None: self.events.post('changed', changed),
+                                    on_progress=lambda done, total: self.events.post('progress', (done, total)))
+        self.load_products_display()
+        self.root.after(self.drain_interval, self.process_events)
+        
+        # Start tracking thread
+        self.tracking_thread = None
+        self.stop_event = threading.Event()
+        
+    def create_widgets(self):
+        # Main frame
+        main_frame = ttk.Frame(self.root, padding="10")
+        main_frame.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+        
+        # Title
+        title_label = tk.Label(main_frame, text="🛒 Price Tracker Bot", 
+                              font=("Arial", 16, "bold"), bg="#f0f0f0", fg="#2c3e50")
+        title_label.grid(row=0, column=0, columnspan=4, pady=(0, 20))
+        
+        # Add product section
+        add_frame = ttk.LabelFrame(main_frame, text="Add Product to Track", padding="10")
+        add_frame.grid(row=1, column=0, columnspan=4, sticky=(tk.W, tk.E), pady=(0, 10))
+        
+        ttk.Label(add_frame, text="Product URL:").grid(row=0, column=0, sticky=tk.W, pady=2)
+        self.url_entry = ttk.Entry(add_frame, width=60)
+        self.url_entry.grid(row=0, column=1, columnspan=2, sticky=(tk.W, tk.E), pady=2, padx=(10, 0))
+        
+        ttk.Label(add_frame, text="Product Name:").grid(row=1, column=0, sticky=tk.W, pady=2)
+        self.name_entry = ttk.Entry(add_frame, width=30)
+        self.name_entry.grid(row=1, column=1, sticky=(tk.W, tk.E), pady=2, padx=(10, 0))
+        
+        ttk.Label(add_frame, text="Target Price ($):").grid(row=2, column=0, sticky=tk.W, pady=2)
+        self.target_price_entry = ttk.Entry(add_frame, width=15)
+        self.target_price_entry.grid(row=2, column=1, sticky=tk.W, pady=2, padx=(10, 0))
+        
+        add_btn = ttk.Button(add_frame, text="Add Product", command=self.add_product)
+        add_btn.grid(row=2, column=2, padx=(10, 0), pady=2)
+        
+        import_btn = ttk.Button(add_frame, text="Import List...", command=self.import_products)
+        import_btn.grid(row=2, column=3, padx=(10, 0), pady=2)
+        
+        # Tracking controls
+        control_frame = ttk.LabelFrame(main_frame, text="Tracking Controls", padding="10")
+        control_frame.grid(row=2, column=0, columnspan=4, sticky=(tk.W, tk.E), pady=(0, 10))
+        
+        ttk.Label(control_frame, text="Check Interval (minutes):").grid(row=0, column=0, sticky=tk.W)
+        interval_spinbox = ttk.Spinbox(control_frame, from_=5, to=1440, width=10, textvariable=self.check_interval)
+        interval_spinbox.grid(row=0, column=1, padx=(10, 0))
+        self.check_interval.trace_add("write", self.update_interval)
+        
+        self.start_btn = ttk.Button(control_frame, text="Start Tracking", command=self.toggle_tracking)
+        self.start_btn.grid(row=0, column=2, padx=(20, 0))
+        
+        self.status_label = tk.Label(control_frame, text="Status: Stopped", fg="red")
+        self.status_label.grid(row=0, column=3, padx=(20, 0))
+        
+        self.progress_label = tk.Label(control_frame, text="")
+        self.progress_label.grid(row=0, column=4, padx=(20, 0))
+        
+        # Alert settings
+        alert_frame = ttk.LabelFrame(main_frame, text="Alert Settings", padding="10")
+        alert_frame.grid(row=3, column=0, columnspan=4, sticky=(tk.W, tk.E), pady=(0, 10))
+        
+        self.sound_alerts = tk.BooleanVar(value=True)
+        self.popup_alerts = tk.BooleanVar(value=True)
+        
+        ttk.Checkbutton(alert_frame, text="Sound Alerts", variable=self.sound_alerts).grid(row=0, column=0, sticky=tk.W)
+        ttk.Checkbutton(alert_frame, text="Popup Alerts", variable=self.popup_alerts).grid(row=0, column=1, padx=(20, 0), sticky=tk.W)
+        
+        # Products display
+        products_frame = ttk.LabelFrame(main_frame, text="Tracked Products", padding="10")
+        products_frame.grid(row=4, column=0, columnspan=4, sticky=(tk.W, tk.E, tk.N, tk.S), pady=(0, 10))
+        
+        # Filter and paging controls
+        view_frame = ttk.Frame(products_frame)
+        view_frame.grid(row=0, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=(0, 5))
+        
+        ttk.Label(view_frame, text="Show:").pack(side=tk.LEFT)
+        self.status_filter = tk.StringVar(value="All")
+        filter_box = ttk.Combobox(view_frame, textvariable=self.status_filter, state="readonly", width=18,
+                                  values=("All",) + self.STATUSES)
+        filter_box.pack(side=tk.LEFT, padx=(5, 0))
+        filter_box.bind("<<ComboboxSelected>>", lambda event: self.show_page(0))
+        
+        ttk.Button(view_frame, text="Next ▶", command=lambda: self.show_page(self.page + 1)).pack(side=tk.RIGHT)
+        self.page_label = ttk.Label(view_frame, text="")
+        self.page_label.pack(side=tk.RIGHT, padx=10)
+        ttk.Button(view_frame, text="◀ Prev", command=lambda: self.show_page(self.page - 1)).pack(side=tk.RIGHT)
+        
+        # Treeview for products
+        columns = ("Name", "Current Price", "Target Price", "Savings", "Deal", "Status", "Last Checked")
+        self.products_tree = ttk.Treeview(products_frame, columns=columns, show="headings", height=8)
+        
+        for col in columns:
+            self.products_tree.heading(col, text=col, command=lambda c=col: self.sort_by(c))
+            if col == "Name":
+                self.products_tree.column(col, width=200)
+            else:
+                self.products_tree.column(col, width=100)
+        
+        scrollbar_v = ttk.Scrollbar(products_frame, orient=tk.VERTICAL, command=self.products_tree.yview)
+        self.products_tree.configure(yscrollcommand=scrollbar_v.set)
+        
+        self.products_tree.grid(row=1, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+        scrollbar_v.grid(row=1, column=1, sticky=(tk.N, tk.S))
+        
+        # Double click to open URL
+        self.products_tree.bind("<Double-1>", self.open_product_url)
+        
+        # Buttons for product management
+        btn_frame = ttk.Frame(products_frame)
+        btn_frame.grid(row=2, column=0, columnspan=2, pady=(10, 0))
+        
+        ttk.Button(btn_frame, text="Remove Selected", command=self.remove_product).pack(side=tk.LEFT, padx=(0, 10))
+        ttk.Button(btn_frame, text="Check Now", command=self.check_selected_product).pack(side=tk.LEFT, padx=(0, 10))
+        ttk.Button(btn_frame, text="Check All", command=self.check_all_products).pack(side=tk.LEFT, padx=(0, 10))
+        ttk.Button(btn_frame, text="Open URL", command=self.open_selected_url).pack(side=tk.LEFT, padx=(0, 10))
+        ttk.Button(btn_frame, text="Top Deals", command=lambda: self.engine.log_deals(10)).pack(side=tk.LEFT)
+        
+        # Log area
+        log_frame = ttk.LabelFrame(main_frame, text="Activity Log", padding="10")
+        log_frame.grid(row=5, column=0, columnspan=4, sticky=(tk.W, tk.E, tk.N, tk.S))
+        
+        self.log_text = scrolledtext.ScrolledText(log_frame, height=8, width=70)
+        self.log_text.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+        
+        # Configure grid weights
+        main_frame.columnconfigure(1, weight=1)
+        main_frame.rowconfigure(4, weight=1)
+        main_frame.rowconfigure(5, weight=1)
+        products_frame.columnconfigure(0, weight=1)
+        products_frame.rowconfigure(1, weight=1)
+        log_frame.columnconfigure(0, weight=1)
+        log_frame.rowconfigure(0, weight=1)
+        self.root.columnconfigure(0, weight=1)
+        self.root.rowconfigure(0, weight=1)
+        
+    def log_message(self, message):
+        """Queue a timestamped log line; safe to call from any thread"""
+        timestamp = datetime.now().strftime("%H:%M:%S")
+        self.events.post('log', f"[{timestamp}] {message}\n")
+        
+    def append_log(self, entries):
+        """Insert log lines in one go and keep the widget to max_log_lines"""
+        self.log_text.insert(tk.END, "".join(entries))
+        lines = int(self.log_text.index("end-1c").split(".")[0])
+        if lines > self.max_log_lines:
+            self.log_text.delete("1.0", f"{lines - self.max_log_lines + 1}.0")
+        self.log_text.see(tk.END)
+        
+    def process_events(self):
+        """Apply a batch of queued engine events on the Tk thread"""
+        try:
+            self.apply_events(self.events.drain(self.max_events_per_tick))
+        finally:
+            self.root.after(self.drain_interval, self.process_events)
+            
+    def apply_events(self, events):
+        """Coalesce a batch of events into one log insert and one table refresh"""
+        entries = []
+        changed = {}
+        resync = False
+        progress = None
+        digest = []
+        for kind, payload in events:
+            if kind == 'log':
+                entries.append(payload)
+            elif kind == 'changed':
+                if payload is None:
+                    resync = True
+                else:
+                    changed.update((product['id'], product) for product in payload)
+            elif kind == 'progress':
+                progress = payload
+            elif kind == 'alert':
+                digest.extend(payload)
+                
+        if entries:
+            self.append_log(entries)
+        if resync:
+            self.load_products_display()
+        if changed:
+            self.load_products_display(list(changed.values()))
+        if progress:
+            done, total = progress
+            self.progress_label.config(text="" if done == total else f"Checking {done}/{total}")
+        if digest:
+            # One popup for everything that arrived since the last tick
+            self.show_price_alert(digest)
+            
+    def run_in_background(self, func, *args):
+        """Run a slow engine call off the Tk thread; results arrive as events"""
+        threading.Thread(target=func, args=args, daemon=True).start()
+        
+    def play_alert_sound(self):
+        """Play system alert sound"""
+        try:
+            if self.sound_alerts.get():
+                # Try to play system bell sound
+                self.root.bell()
+        except:
+            pass
+            
+    def add_product(self):
+        """Add new product to tracking list"""
+        url = self.url_entry.get().strip()
+        name = self.name_entry.get().strip()
+        target_price_str = self.target_price_entry.get().strip()
+        
+        if not url or not name or not target_price_str:
+            messagebox.showerror("Error", "Please fill in all fields")
+            return
+            
+        try:
+            target_price = float(target_price_str)
+        except ValueError:
+            messagebox.showerror("Error", "Target price must be a number")
+            return
+            
+        if self.engine.find_product(url) is not None:
+            messagebox.showerror("Error", "This product is already being tracked")
+            return
+            
+        # The initial price fetch takes seconds; the new row arrives as an event
+        self.run_in_background(self.add_product_in_background, name, url, target_price)
+        
+        # Clear entries
+        self.url_entry.delete(0, tk.END)
+        self.name_entry.delete(0, tk.END)
+        self.target_price_entry.delete(0, tk.END)
+            
+    def add_product_in_background(self, name, url, target_price):
+        try:
+            self.engine.add_product(name, url, target_price)
+        except ValueError as e:
+            self.log_message(f"❌ Could not add {name}: {str(e)}")
+            
+    def import_products(self):
+        """Add the products listed in a CSV or JSON Lines file and price them in the background"""
+        path = filedialog.askopenfilename(title="Import Products",
+                                          filetypes=[("Product lists", "*.csv *.jsonl *.ndjson"), ("All files", "*.*")])
+        if path:
+            self.run_in_background(self.import_in_background, path)
+            
+    def import_in_background(self, path):
+        try:
+            self.engine.import_products(path)
+        except (OSError, ValueError, sqlite3.Error) as e:
+            self.log_message(f"❌ Import failed: {str(e)}")
+            
+    def selected_product(self):
+        """Product of the selected row (rows are keyed by product id), or None"""
+        selection = self.products_tree.selection()
+        return self.engine.get_product(int(selection[0])) if selection else None
+        
+    def remove_product(self):
+        """Remove selected product from tracking"""
+        product = self.selected_product()
+        if product is None:
+            messagebox.showwarning("Warning", "Please select a product to remove")
+            return
+            
+        self.engine.remove_product(product)
+        
+    def check_selected_product(self):
+        """Check price for selected product"""
+        product = self.selected_product()
+        if product is None:
+            messagebox.showwarning("Warning", "Please select a product to check")
+            return
+            
+        self.run_in_background(self.engine.check_product_price, product)
+        
+    def check_all_products(self):
+        """Check prices for all products"""
+        if not self.engine.products:
+            messagebox.showinfo("Info", "No products to check")
+            return
+            
+        self.run_in_background(self.engine.check_all_products)
+        
+    def show_price_alert(self, digest):
+        """Show a digest of price alerts to user (the engine throttles and counts them)"""
+        self.play_alert_sound()
+        
+        if self.popup_alerts.get():
+            pages = "the product page" if len(digest) == 1 else f"all {len(digest)} product pages"
+            message = f"🎯 PRICE ALERT!\n\n"
+            message += alert_summary(digest) + "\n\n"
+            message += f"Would you like to open {pages}?"
+            
+            result = messagebox.askyesno("Price Alert!", message)
+            if result:
+                for alert in digest:
+                    webbrowser.open(alert['url'])
+        
+    def open_product_url(self, event):
+        """Open product URL when double-clicked"""
+        product = self.selected_product()
+        if product is not None:
+            webbrowser.open(product['url'])
+            self.log_message(f"🌐 Opened {product['name']} in browser")
+                    
+    def open_selected_url(self):
+        """Open selected product URL"""
+        product = self.selected_product()
+        if product is None:
+            messagebox.showwarning("Warning", "Please select a product first")
+            return
+            
+        webbrowser.open(product['url'])
+        self.log_message(f"🌐 Opened {product['name']} in browser")
+            
+    def toggle_tracking(self):
+        """Start or stop price tracking"""
+        if self.tracking_active.get():
+            # Stop tracking
+            self.tracking_active.set(False)
+            self.stop_event.set()
+            self.start_btn.config(text="Start Tracking")
+            self.status_label.config(text="Status: Stopped", fg="red")
+            self.log_message("⏹️ Tracking stopped")
+        else:
+            # Start tracking
+            if not self.engine.products:
+                messagebox.showwarning("Warning", "No products to track. Add some products first.")
+                return
+                
+            self.tracking_active.set(True)
+            self.engine.check_interval = self.check_interval.get()
+            self.stop_event = threading.Event()
+            self.start_btn.config(text="Stop Tracking")
+            self.status_label.config(text="Status: Running", fg="green")
+            self.log_message(f"▶️ Tracking started - base interval {self.check_interval.get()} minutes, adapted per product")
+            
+            # Start tracking thread
+            self.tracking_thread = threading.Thread(target=self.engine.run, args=(self.stop_event,), daemon=True)
+            self.tracking_thread.start()
+            
+    def update_interval(self, *args):
+        """Pass interval changes from the spinbox on to the engine"""
+        try:
+            self.engine.check_interval = self.check_interval.get()
+        except (tk.TclError, AttributeError):
+            pass
+            
+    def format_row(self, product, stats=None):
+        """Display values and sort keys for one product; stats is its analytics row, if any"""
+        current = product['current_price']
+        target = product['target_price']
+        current_price = f"${current:.2f}" if current else "N/A"
+        target_price = f"${target:.2f}"
+        
+        # Calculate savings
+        savings = "N/A"
+        savings_amount = None
+        if current:
+            savings_amount = target - current
+            if current <= target:
+                savings = f"+${savings_amount:.2f}"
+            else:
+                savings = f"-${-savings_amount:.2f}"
+        
+        # Deal score from the catalogue analytics, with the discount to the 90-day median
+        deal = "N/A"
+        score = stats['score'] if stats else None
+        if score is not None:
+            deal = f"{score:.0f}"
+            if (stats['below90'] or 0) > 0:
+                deal += f" (-{stats['below90']:.0%})"
+        
+        # Status
+        if current and current <= target:
+            status = self.STATUSES[0]
+        elif current:
+            status = self.STATUSES[1]
+        else:
+            status = self.STATUSES[2]
+            
+        last_checked = "Never"
+        if product.get('last_checked'):
+            try:
+                dt = datetime.fromisoformat(product['last_checked'])
+                last_checked = dt.strftime("%m/%d %H:%M")
+            except:
+                pass
+                
+        # Truncate long names
+        display_name = product['name'][:30] + "..." if len(product['name']) > 30 else product['name']
+        
+        values = (display_name, current_price, target_price, savings, deal, status, last_checked)
+        keys = {
+            "Name": product['name'].lower(),
+            "Current Price": current if current else float('inf'),
+            "Target Price": target,
+            "Savings": savings_amount if savings_amount is not None else float('-inf'),
+            "Deal": score if score is not None else float('-inf'),
+            "Status": status,
+            "Last Checked": product.get('last_checked') or ""
+        }
+        return values, keys
+        
+    def load_products_display(self, changed=None):
+        """Update the products display, reformatting only products that changed
+
+        changed is the list of products whose data changed; None means products
+        may have been added or removed, so the row cache is resynchronised.
+        """
+        if changed is None:
+            for product_id in list(self.rows):
+                if self.engine.get_product(product_id) is None:
+                    del self.rows[product_id]
+            changed = [product for product in self.engine.products if product['id'] not in self.rows]
+            
+        analytics = self.engine.analytics
+        for product in changed:
+            if self.engine.get_product(product['id']) is not product:
+                continue  # removed since the event was posted
+            # Skip formatting when nothing shown in the row has changed
+            stats = analytics.row(product['id']) if analytics is not None else None
+            signature = (product['name'], product['current_price'], product['target_price'], product.get('last_checked'),
+                         stats and (stats['score'], stats['below90']))
+            row = self.rows.get(product['id'])
+            if row is None or row[0] != signature:
+                self.rows[product['id']] = (signature,) + self.format_row(product, stats)
+                
+        self.show_page(self.page)
+        
+    def sort_by(self, column):
+        """Sort the table by a column; clicking it again reverses the order"""
+        if self.sort_column == column:
+            self.sort_reverse = not self.sort_reverse
+        else:
+            self.sort_column = column
+            self.sort_reverse = False
+        self.show_page(0)
+        
+    def visible_ids(self):
+        """Product ids that pass the status filter, in display order"""
+        wanted = self.status_filter.get()
+        ids = [product_id for product_id, row in self.rows.items()
+               if wanted == "All" or row[2]["Status"] == wanted]
+        if self.sort_column:
+            ids.sort(key=lambda product_id: self.rows[product_id][2][self.sort_column], reverse=self.sort_reverse)
+        return ids
+        
+    def show_page(self, page):
+        """Diff one page of rows into the tree instead of rebuilding it"""
+        ids = self.visible_ids()
+        pages = max(1, -(-len(ids) // self.page_size))
+        self.page = max(0, min(page, pages - 1))
+        start = self.page * self.page_size
+        wanted = [str(product_id) for product_id in ids[start:start + self.page_size]]
+        
+        stale = set(self.shown) - set(wanted)
+        if stale:
+            self.products_tree.delete(*stale)
+            for iid in stale:
+                del self.shown[iid]
+                
+        # Mirror of the tree's row order, kept in step with every insert and move
+        order = list(self.products_tree.get_children())
+        for index, iid in enumerate(wanted):
+            values = self.rows[int(iid)][1]
+            if iid not in self.shown:
+                self.products_tree.insert("", index, iid=iid, values=values)
+                order.insert(index, iid)
+            else:
+                if self.shown[iid] != values:
+                    self.products_tree.item(iid, values=values)
+                if order[index] != iid:
+                    self.products_tree.move(iid, "", index)
+                    order.remove(iid)
+                    order.insert(index, iid)
+            self.shown[iid] = values
+            
+        self.page_label.config(text=f"Page {self.page + 1}/{pages} ({len(ids)} products)")
+            
+def main():
+    root = tk.Tk()
+    app = PriceTracker(root)
+    
+    # Add some styling
+    try:
+        style = ttk.Style()
+        style.theme_use('clam')
+    except:
+        pass
+    
+    # Center window on screen
+    root.update_idletasks()
+    width = root.winfo_width()
+    height = root.winfo_height()
+    x = (root.winfo_screenwidth() // 2) - (width // 2)
+    y = (root.winfo_screenheight() // 2) - (height // 2)
+    root.geometry(f"{width}x{height}+{x}+{y}")
+    
+    # Add initial welcome message
+    app.log_message("🚀 Price Tracker Bot started successfully!")
+    app.log_message("💡 Tip: Double-click on any product to open its URL in browser")
+    
+    root.mainloop()
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
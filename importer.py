@@ -0,0 +1,88 @@
+import csv
+import json
+import math
+import os
+
+# Reported invalid rows; any further ones are only counted
+MAX_ERRORS = 20
+
+
+def normalize_url(url):
+    """Product URL with a scheme (https:// is assumed when none is given)"""
+    url = url.strip()
+    if not url.lower().startswith(('http://', 'https://')):
+        url = 'https://' + url
+    return url
+
+
+class ProductListReader:
+    """Streams (name, url, target_price) rows from a CSV or JSON Lines file
+
+    CSV files need a header row with url and target_price columns (name is
+    optional and defaults to the URL); .jsonl/.ndjson files hold one object
+    with the same keys per line. Rows are read one at a time, so files of any
+    size use constant memory. Invalid rows are skipped and counted in invalid,
+    the first MAX_ERRORS of them described in errors.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.rows = 0
+        self.invalid = 0
+        self.errors = []
+
+    def __iter__(self):
+        records = self.jsonl_records() if self.is_jsonl() else self.csv_records()
+        for line, record in records:
+            self.rows += 1
+            try:
+                yield self.parse(record)
+            except (KeyError, TypeError, ValueError) as e:
+                self.invalid += 1
+                if len(self.errors) < MAX_ERRORS:
+                    self.errors.append(f"line {line}: {e}")
+
+    def is_jsonl(self):
+        return os.path.splitext(self.path)[1].lower() in ('.jsonl', '.ndjson')
+
+    def csv_records(self):
+        with open(self.path, 'r', encoding='utf-8-sig', newline='') as f:
+            reader = csv.DictReader(f)
+            if reader.fieldnames is None:
+                return
+            reader.fieldnames = [name.strip().lower() for name in reader.fieldnames]
+            if 'url' not in reader.fieldnames or 'target_price' not in reader.fieldnames:
+                raise ValueError(f"{self.path} needs a header row with url and target_price columns")
+            for record in reader:
+                yield reader.line_num, record
+
+    def jsonl_records(self):
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line, text in enumerate(f, 1):
+                if text.strip():
+                    try:
+                        yield line, json.loads(text)
+                    except json.JSONDecodeError as e:
+                        yield line, ValueError(f"invalid JSON ({e.msg})")
+
+    def parse(self, record):
+        if isinstance(record, Exception):
+            raise record
+        if not isinstance(record, dict):
+            raise ValueError("expected a JSON object")
+        url = self.text(record, 'url')
+        if not url:
+            raise ValueError("missing url")
+        target_price = float(str(record['target_price']).strip().lstrip('$').replace(',', ''))
+        if not math.isfinite(target_price) or target_price <= 0:
+            raise ValueError(f"target price must be a positive number, got {target_price}")
+        name = self.text(record, 'name') or url
+        return name, normalize_url(url), target_price
+
+    @staticmethod
+    def text(record, key):
+        """Stripped string value of key ('' when missing); JSON rows may hold other types"""
+        value = record.get(key) or ''
+        if not isinstance(value, str):
+            raise ValueError(f"{key} must be a string, got {type(value).__name__}")
+        return value.strip()
@@ -0,0 +1,176 @@
+import bisect
+import cProfile
+import os
+import pstats
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+SECONDS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+SWEEP_BUCKETS = (1, 5, 15, 30, 60, 120, 300, 600, 1800, 3600)
+BYTES_BUCKETS = (16384, 65536, 262144, 1048576, 4194304)
+
+# name: (type, help, histogram buckets)
+METRICS = {
+    'checks_total': ('counter', 'Page fetches by host and outcome', None),
+    'bytes_downloaded_total': ('counter', 'Response body bytes read', None),
+    'extractions_total': ('counter', 'Prices extracted by tier and site selector', None),
+    'queue_wait_seconds': ('histogram', 'Time from sweep start until a fetch worker picked the page up', SECONDS_BUCKETS),
+    'connect_seconds': ('histogram', 'DNS lookup and TCP/TLS connect time (0 on reused connections)', SECONDS_BUCKETS),
+    'ttfb_seconds': ('histogram', 'Time from connected until response headers arrived', SECONDS_BUCKETS),
+    'download_seconds': ('histogram', 'Time spent reading the response body', SECONDS_BUCKETS),
+    'download_bytes': ('histogram', 'Body bytes read per fetch', BYTES_BUCKETS),
+    'parse_seconds': ('histogram', 'Price extraction time per page', SECONDS_BUCKETS),
+    'store_write_seconds': ('histogram', 'Time to commit buffered product changes', SECONDS_BUCKETS),
+    'sweep_duration_seconds': ('histogram', 'Wall time of a check sweep', SWEEP_BUCKETS),
+    'sweep_success_ratio': ('gauge', 'Share of products in the last sweep that got a price', None),
+    'products': ('gauge', 'Products being tracked', None),
+    'backlog': ('gauge', 'Products whose check is overdue', None),
+}
+
+
+def label_text(labels):
+    if not labels:
+        return ''
+    pairs = ','.join('%s="%s"' % (key, str(value).replace('\\', '\\\\').replace('"', '\\"')) for key, value in labels)
+    return '{' + pairs + '}'
+
+
+class Histogram:
+    __slots__ = ('buckets', 'counts', 'sum', 'count')
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def lines(self, name, labels):
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            yield f"{name}_bucket{label_text(labels + (('le', bound),))} {cumulative}"
+        yield f"{name}_bucket{label_text(labels + (('le', '+Inf'),))} {self.count}"
+        yield f"{name}_sum{label_text(labels)} {self.sum}"
+        yield f"{name}_count{label_text(labels)} {self.count}"
+
+
+class Metrics:
+    """Thread-safe counters, gauges and histograms from METRICS, keyed by label values
+
+    render() produces the Prometheus text format; write() puts it in a file for
+    node_exporter's textfile collector and serve() exposes it on /metrics.
+    """
+
+    def __init__(self, prefix='price_tracker'):
+        self.prefix = prefix
+        self.values = {name: {} for name in METRICS}
+        self.lock = threading.Lock()
+
+    def inc(self, name, amount=1, **labels):
+        key = tuple(sorted(labels.items()))
+        with self.lock:
+            series = self.values[name]
+            series[key] = series.get(key, 0) + amount
+
+    def set(self, name, value, **labels):
+        with self.lock:
+            self.values[name][tuple(sorted(labels.items()))] = value
+
+    def observe(self, name, value, **labels):
+        key = tuple(sorted(labels.items()))
+        with self.lock:
+            series = self.values[name]
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = Histogram(METRICS[name][2])
+            histogram.observe(value)
+
+    def render(self):
+        lines = []
+        with self.lock:
+            for name, (kind, help_text, _) in METRICS.items():
+                full_name = f"{self.prefix}_{name}"
+                lines.append(f"# HELP {full_name} {help_text}")
+                lines.append(f"# TYPE {full_name} {kind}")
+                for labels, value in sorted(self.values[name].items()):
+                    if kind == 'histogram':
+                        lines.extend(value.lines(full_name, labels))
+                    else:
+                        lines.append(f"{full_name}{label_text(labels)} {value}")
+        return '\n'.join(lines) + '\n'
+
+    def write(self, path):
+        """Replace path atomically so scrapers never read a half-written file"""
+        temp = path + '.tmp'
+        with open(temp, 'w') as f:
+            f.write(self.render())
+        os.replace(temp, path)
+
+    def serve(self, port, host='127.0.0.1'):
+        """Serve GET /metrics from a background thread; returns the server"""
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                body = metrics.render().encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+
+
+class SweepProfiler:
+    """cProfile of one sweep, merged with the fetch worker threads it used
+
+    Before Python 3.12 a profiler only sees its own thread, so each worker call
+    gets its own profiler; from 3.12 the sweep's profiler already covers every
+    thread and enabling a second one fails, which run() tolerates.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.profile = cProfile.Profile()
+        self.workers = []
+        self.lock = threading.Lock()
+
+    def __enter__(self):
+        self.profile.enable()
+        return self
+
+    def __exit__(self, *exc):
+        self.profile.disable()
+        stats = pstats.Stats(self.profile)
+        for profile in self.workers:
+            stats.add(profile)
+        stats.dump_stats(self.path)
+
+    def run(self, func, *args):
+        """Call func(*args) in a worker thread under its own profiler"""
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            return func(*args)
+        try:
+            return func(*args)
+        finally:
+            profile.disable()
+            with self.lock:
+                self.workers.append(profile)
@@ -0,0 +1,150 @@
+import hashlib
+import threading
+
+REGION_SIZE = 8192
+CHUNK_SIZE = 16384
+
+
+def price_region(body, markers):
+    """Return the slice of the page around the first price marker, or the whole page"""
+    for marker in markers:
+        index = body.find(marker)
+        if index != -1:
+            return body[max(0, index - 256):index + REGION_SIZE]
+    return body
+
+
+def read_price_region(response, markers, max_bytes, found=None, chunk_size=CHUNK_SIZE):
+    """Read a streamed response body only as far as the price needs
+
+    Stops once REGION_SIZE bytes past the first price marker have arrived, once
+    found(head) reports a price in the completed <head>, or at max_bytes; the
+    caller closes the response, dropping the rest of the download. Returns
+    (body, complete), complete being False when the body was cut short.
+    """
+    body = bytearray()
+    longest = max((len(marker) for marker in markers), default=0)
+    region_end = None
+    head_checked = found is None
+    for chunk in response.iter_content(chunk_size):
+        # Only rescan the new bytes (plus enough overlap for a marker split across chunks)
+        start = max(0, len(body) - longest)
+        body += chunk
+        if region_end is None:
+            for marker in markers:
+                index = body.find(marker, start)
+                if index != -1:
+                    region_end = index + REGION_SIZE
+                    break
+        if not head_checked:
+            head_end = body.find(b'</head>', max(0, start - 6))
+            if head_end != -1:
+                head_checked = True
+                if found(bytes(body[:head_end])):
+                    break
+        if (region_end is not None and len(body) >= region_end) or len(body) >= max_bytes:
+            break
+    else:
+        if len(body) <= max_bytes:
+            return bytes(body), True
+    # End on a tag boundary, so the last text in the body is never a number cut in half
+    end = body.rfind(b'<', 0, max_bytes)
+    return bytes(body[:end if end > 0 else max_bytes]), False
+
+
+class ResponseCache:
+    """Per-URL validators and region hashes used to skip re-parsing unchanged pages
+
+    Entries live in memory; the owner persists them, taking only the entries
+    changed since the last save from changes().
+    """
+
+    def __init__(self, entries=None):
+        self.entries = dict(entries or {})
+        self.changed = set()
+        self.lock = threading.Lock()
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.stats = {'not_modified': 0, 'unchanged': 0, 'misses': 0}
+
+    def conditional_headers(self, url):
+        """If-None-Match / If-Modified-Since headers for a previously seen URL"""
+        with self.lock:
+            entry = self.entries.get(url)
+        headers = {}
+        if entry:
+            if entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def not_modified(self, url):
+        """Return the cached entry after a 304 response"""
+        with self.lock:
+            entry = self.entries.get(url)
+            if entry is None:
+                self.stats['misses'] += 1
+                return None
+            self.stats['not_modified'] += 1
+            return entry
+
+    def lookup(self, url, body, markers=()):
+        """Hash the price region of body; return (cached entry or None, digest)"""
+        digest = hashlib.sha1(price_region(body, markers)).hexdigest()
+        with self.lock:
+            entry = self.entries.get(url)
+            if entry and entry.get('hash') == digest:
+                self.stats['unchanged'] += 1
+                return entry, digest
+            self.stats['misses'] += 1
+        return None, digest
+
+    def whole_page(self, url):
+        """Whether url's price lies past its first price marker's region, so the page is read and hashed whole"""
+        with self.lock:
+            return self.entries.get(url, {}).get('whole_page', False)
+
+    def mark_whole_page(self, url):
+        with self.lock:
+            self.entries.setdefault(url, {})['whole_page'] = True
+            self.changed.add(url)
+
+    def invalidate(self, url):
+        """Forget url's validators, hash and price, so its next check parses the page again"""
+        with self.lock:
+            if url in self.entries:
+                self.entries[url] = {'whole_page': self.entries[url].get('whole_page', False)}
+                self.changed.add(url)
+
+    def store(self, url, headers, digest, price, tier=None):
+        """Remember validators, region hash and extracted price for url"""
+        if price is None:
+            return
+        with self.lock:
+            self.entries[url] = {
+                'etag': headers.get('ETag'),
+                'last_modified': headers.get('Last-Modified'),
+                'hash': digest,
+                'price': price,
+                'tier': tier,
+                'whole_page': self.entries.get(url, {}).get('whole_page', False)
+            }
+            self.changed.add(url)
+
+    def summary(self):
+        """One-line hit/miss summary, resetting the counters for the next sweep"""
+        with self.lock:
+            stats = self.stats
+            self.reset_stats()
+        hits = stats['not_modified'] + stats['unchanged']
+        return (f"Cache: {hits} hits ({stats['not_modified']} not modified, "
+                f"{stats['unchanged']} unchanged), {stats['misses']} misses")
+
+    def changes(self):
+        """{url: entry} of entries stored or marked since the last call"""
+        with self.lock:
+            changed = {url: dict(self.entries[url]) for url in self.changed}
+            self.changed = set()
+        return changed
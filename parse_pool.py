@@ -0,0 +1,107 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from extractors import extract_structured_price, partial_hit_holds, run_dom_tiers
+from site_profiles import SiteRegistry
+
+# Site profiles of a worker process, loaded once by init_worker()
+worker_registry = None
+
+
+def init_worker(profiles_file):
+    global worker_registry
+    worker_registry = SiteRegistry.load(profiles_file)
+
+
+def parse_page(body, profile_name, selector_order, backend, scoped):
+    """Worker side: (price, tier, outcome) for raw page bytes
+
+    outcome is None when structured data had the price, otherwise the css of
+    the site selector that hit (or None) and of those that missed.
+    """
+    price, tier = extract_structured_price(body)
+    if price is not None:
+        return price, tier, None
+
+    profile = worker_registry.get(profile_name) if profile_name else None
+    selectors = None
+    if profile is not None:
+        by_css = {selector.css: selector for selector in profile.selectors}
+        selectors = [by_css[css] for css in selector_order if css in by_css]
+    price, tier, hit, missed = run_dom_tiers(body, profile, selectors, backend, scoped)
+    return price, tier, (hit.css if hit else None, [selector.css for selector in missed])
+
+
+class ParserPool:
+    """Extracts prices from raw page bytes in worker processes, past the GIL
+
+    Fetch threads keep doing the network I/O and hand over response bytes;
+    workers send back only the price, its tier and which selectors matched, and
+    the selector learning is applied to the registry in this process. At most
+    max_pending pages wait for a worker, so callers block (and stop downloading)
+    when parsing falls behind. The processes are started on first use.
+    """
+
+    def __init__(self, registry, profiles_file=None, workers=None, max_pending=None):
+        self.registry = registry
+        self.profiles_file = profiles_file
+        self.workers = (os.cpu_count() or 1) if workers is None else workers
+        self.max_pending = max_pending
+        self.executor = None
+        self.slots = None
+        self.lock = threading.Lock()
+
+    def start(self):
+        with self.lock:
+            if self.executor is None:
+                # Forking would copy the engine's threads and locks mid-use (the pool starts during a sweep)
+                self.executor = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context('spawn'),
+                                                    initializer=init_worker, initargs=(self.profiles_file,))
+                self.slots = threading.BoundedSemaphore(self.max_pending or self.workers * 2)
+            return self.executor, self.slots
+
+    def submit(self, body, profile, order, backend, scoped):
+        executor, slots = self.start()
+        with slots:
+            try:
+                future = executor.submit(parse_page, body, profile.name if profile else None,
+                                         order, backend, scoped)
+                return future.result()
+            except BrokenProcessPool:
+                # A worker died (e.g. out of memory); start a fresh pool next time
+                with self.lock:
+                    if self.executor is executor:
+                        self.executor = None
+                raise
+
+    def find_price(self, body, url, backend='html.parser', scoped=True, complete=True):
+        """Tiered extraction of url's page in a worker; return (price, tier)"""
+        profile = self.registry.profile_for(url)
+        order = [selector.css for selector in self.registry.ordered_selectors(profile, url)] if profile else []
+        price, tier, outcome = self.submit(body, profile, order, backend, scoped)
+        if not complete and outcome is not None and price is not None \
+                and not partial_hit_holds(tier, outcome[0], order[0] if order else None):
+            return None, None
+
+        if profile is not None and outcome is not None:
+            by_css = {selector.css: selector for selector in profile.selectors}
+            hit_css, missed_css = outcome
+            self.registry.record(profile, url, by_css.get(hit_css),
+                                 [by_css[css] for css in missed_css if css in by_css] if complete else [])
+        return price, tier
+
+    def replay(self, body, url, backend='html.parser', scoped=True):
+        """(price, tier, site selector css) with the profile's own order and no learning"""
+        profile = self.registry.profile_for(url)
+        order = [selector.css for selector in profile.selectors] if profile else []
+        price, tier, outcome = self.submit(body, profile, order, backend, scoped)
+        return price, tier, outcome[0] if outcome else None
+
+    def close(self):
+        with self.lock:
+            if self.executor is not None:
+                self.executor.shutdown(cancel_futures=True)
+                self.executor = None
@@ -0,0 +1,100 @@
+import time
+from array import array
+
+# Full-resolution observations are kept for this long; older ones become daily rollups
+RECENT_SECONDS = 30 * 86400
+BUCKET_SECONDS = 86400
+
+
+class PriceHistory:
+    """Array-backed price series for one product with tiered retention
+
+    Recent observations are stored at full resolution as parallel int64 epoch
+    timestamps and float64 prices. Anything older than RECENT_SECONDS is folded
+    into one min/max/last/count rollup per day, so years of history cost a few
+    bytes per day instead of a dict per observation.
+    """
+
+    __slots__ = ('timestamps', 'prices', 'buckets', 'lows', 'highs', 'lasts', 'counts')
+
+    def __init__(self):
+        self.timestamps = array('q')
+        self.prices = array('d')
+        self.buckets = array('q')
+        self.lows = array('d')
+        self.highs = array('d')
+        self.lasts = array('d')
+        self.counts = array('q')
+
+    def __len__(self):
+        """Number of full-resolution observations"""
+        return len(self.prices)
+
+    def copy(self):
+        """Independent copy of both tiers, safe to read while this one keeps growing"""
+        other = PriceHistory.__new__(PriceHistory)
+        other.timestamps, other.prices = self.timestamps[:], self.prices[:]
+        other.buckets, other.lows, other.highs = self.buckets[:], self.lows[:], self.highs[:]
+        other.lasts, other.counts = self.lasts[:], self.counts[:]
+        return other
+
+    def append(self, price, timestamp=None):
+        """Record an observation (epoch seconds, defaults to now) and fold expired ones"""
+        timestamp = int(time.time() if timestamp is None else timestamp)
+        self.timestamps.append(timestamp)
+        self.prices.append(price)
+        if self.timestamps[0] < timestamp - RECENT_SECONDS:
+            self.compact(timestamp - RECENT_SECONDS)
+
+    def add_rollup(self, bucket, low, high, last, count):
+        """Merge one day of aggregated observations into the rollup tier"""
+        if self.buckets and self.buckets[-1] == bucket:
+            self.lows[-1] = min(self.lows[-1], low)
+            self.highs[-1] = max(self.highs[-1], high)
+            self.lasts[-1] = last
+            self.counts[-1] += count
+        else:
+            self.buckets.append(bucket)
+            self.lows.append(low)
+            self.highs.append(high)
+            self.lasts.append(last)
+            self.counts.append(count)
+
+    def compact(self, cutoff):
+        """Move observations older than cutoff into daily rollups"""
+        n = 0
+        while n < len(self.timestamps) and self.timestamps[n] < cutoff:
+            bucket = self.timestamps[n] // BUCKET_SECONDS * BUCKET_SECONDS
+            start = n
+            while n < len(self.timestamps) and self.timestamps[n] < cutoff \
+                    and self.timestamps[n] // BUCKET_SECONDS * BUCKET_SECONDS == bucket:
+                n += 1
+            day = self.prices[start:n]
+            self.add_rollup(bucket, min(day), max(day), day[-1], n - start)
+        if n:
+            del self.timestamps[:n]
+            del self.prices[:n]
+
+    def latest(self):
+        """(timestamp, price) of the newest observation, or None"""
+        if self.prices:
+            return self.timestamps[-1], self.prices[-1]
+        if self.lasts:
+            return self.buckets[-1], self.lasts[-1]
+        return None
+
+    def series(self):
+        """Zero-copy (timestamps, prices) views of the full-resolution tier
+
+        The views pin the underlying arrays; release them before the next append().
+        """
+        return memoryview(self.timestamps), memoryview(self.prices)
+
+    def rollups(self):
+        """Zero-copy (buckets, lows, highs, lasts, counts) views of the rollup tier"""
+        return tuple(memoryview(column) for column in
+                     (self.buckets, self.lows, self.highs, self.lasts, self.counts))
+
+    def points(self):
+        """Iterate (timestamp, price) full-resolution observations, oldest first"""
+        return zip(self.timestamps, self.prices)
@@ -0,0 +1,133 @@
+import heapq
+import itertools
+import threading
+import time
+from datetime import datetime
+
+# Observations looked at when estimating how often a product's price moves
+VOLATILITY_WINDOW = 20
+
+# Within this fraction above target a product is checked twice as often
+NEAR_TARGET = 0.10
+
+
+class AdaptiveScheduler:
+    """Priority queue of per-product next-check times with volatility-driven intervals
+
+    A product whose recent observations never change is checked up to twice as
+    slowly as the base interval; one that changes on every check up to twice as
+    often. Products close to their target are checked sooner, and each
+    consecutive fetch failure doubles the wait. Every interval is clamped to
+    [min_interval, max_interval] seconds.
+    """
+
+    def __init__(self, min_interval=5 * 60, max_interval=24 * 3600):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.heap = []
+        self.due_at = {}
+        self.failures = {}
+        self.products = {}
+        self.counter = itertools.count()
+        self.lock = threading.Lock()
+
+    def change_rate(self, product):
+        """Fraction of recent consecutive observations where the price changed (None if unknown)"""
+        prices = product['price_history'].prices[-VOLATILITY_WINDOW:]
+        if len(prices) < 2:
+            return None
+        changes = sum(1 for a, b in zip(prices, prices[1:]) if a != b)
+        return changes / (len(prices) - 1)
+
+    def next_interval(self, product, base_interval):
+        """Seconds until a product should be checked again"""
+        interval = base_interval
+        rate = self.change_rate(product)
+        if rate is not None:
+            # rate 0 -> 2x slower, 0.5 -> base, 1 -> 2x faster
+            interval *= 2 ** (1 - 2 * rate)
+
+        current, target = product.get('current_price'), product['target_price']
+        if current and target and 0 < (current - target) / target <= NEAR_TARGET:
+            interval /= 2
+
+        failures = self.failures.get(product['id'], 0)
+        interval *= 2 ** min(failures, 6)
+        return max(self.min_interval, min(self.max_interval, interval))
+
+    def push(self, product, due):
+        with self.lock:
+            self.products[product['id']] = product
+            self.due_at[product['id']] = due
+            heapq.heappush(self.heap, (due, next(self.counter), product['id']))
+
+    def schedule(self, product, base_interval, now=None):
+        """Queue a product based on when it was last checked (overdue products are due now)"""
+        now = time.time() if now is None else now
+        due = now
+        if product.get('last_checked'):
+            try:
+                last = datetime.fromisoformat(product['last_checked']).timestamp()
+                due = max(now, min(last, now) + self.next_interval(product, base_interval))
+            except ValueError:
+                pass
+        self.push(product, due)
+
+    def reschedule(self, product, succeeded, base_interval, now=None):
+        """Record the outcome of a check and queue the product's next one"""
+        now = time.time() if now is None else now
+        with self.lock:
+            if succeeded:
+                self.failures.pop(product['id'], None)
+            else:
+                self.failures[product['id']] = self.failures.get(product['id'], 0) + 1
+        self.push(product, now + self.next_interval(product, base_interval))
+
+    def set_failures(self, failures):
+        """Take over {product id: consecutive failures} kept elsewhere (a worker's shared database)"""
+        with self.lock:
+            for product_id, count in failures.items():
+                if count:
+                    self.failures[product_id] = count
+                else:
+                    self.failures.pop(product_id, None)
+
+    def remove(self, product):
+        """Forget a product; its queued entries are skipped lazily"""
+        with self.lock:
+            self.due_at.pop(product['id'], None)
+            self.products.pop(product['id'], None)
+            self.failures.pop(product['id'], None)
+
+    def pop_due(self, now=None, limit=None):
+        """Take the products whose check is due, most overdue first"""
+        now = time.time() if now is None else now
+        due = []
+        with self.lock:
+            while self.heap and self.heap[0][0] <= now and (limit is None or len(due) < limit):
+                when, _, product_id = heapq.heappop(self.heap)
+                # Skip entries superseded by a later push or removal
+                if self.due_at.get(product_id) != when:
+                    continue
+                del self.due_at[product_id]
+                due.append(self.products[product_id])
+        return due
+
+    def seconds_until_next(self, now=None):
+        """Seconds until the earliest queued check, or None if the queue is empty"""
+        now = time.time() if now is None else now
+        with self.lock:
+            while self.heap and self.due_at.get(self.heap[0][2]) != self.heap[0][0]:
+                heapq.heappop(self.heap)
+            if not self.heap:
+                return None
+            return max(0, self.heap[0][0] - now)
+
+    def overdue(self, now=None):
+        """Number of queued products whose check is due"""
+        now = time.time() if now is None else now
+        with self.lock:
+            return sum(1 for due in self.due_at.values() if due <= now)
+
+    def __len__(self):
+        return len(self.due_at)
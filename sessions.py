@@ -0,0 +1,208 @@
+import importlib.util
+import json
+import os
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.cookies import create_cookie
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+from fetcher import host_of
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+# httpx speaks HTTP/2 only with its optional h2 dependency (httpx[http2])
+HTTP2_AVAILABLE = httpx is not None and importlib.util.find_spec('h2') is not None
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.5',
+    'Accept-Encoding': 'gzip, deflate, br',
+    'Connection': 'keep-alive',
+    'Upgrade-Insecure-Requests': '1'
+}
+
+
+# Seconds each thread has spent opening connections (DNS, TCP and TLS handshakes)
+connect_time = threading.local()
+
+
+def connect_seconds():
+    """Connect time accumulated by the calling thread; diff it around a request"""
+    return getattr(connect_time, 'seconds', 0.0)
+
+
+def timed_connection(connection_class):
+    class TimedConnection(connection_class):
+        def connect(self):
+            start = time.perf_counter()
+            try:
+                super().connect()
+            finally:
+                connect_time.seconds = connect_seconds() + time.perf_counter() - start
+    return TimedConnection
+
+
+class TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = timed_connection(HTTPConnection)
+
+
+class TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = timed_connection(HTTPSConnection)
+
+
+TIMED_POOL_CLASSES = {'http': TimedHTTPConnectionPool, 'https': TimedHTTPSConnectionPool}
+
+
+class TimedHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter whose new connections add their setup time to connect_seconds()"""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = TIMED_POOL_CLASSES
+
+    def proxy_manager_for(self, proxy, **proxy_kwargs):
+        manager = super().proxy_manager_for(proxy, **proxy_kwargs)
+        manager.pool_classes_by_scheme = TIMED_POOL_CLASSES
+        return manager
+
+
+class HTTP2Session:
+    """Minimal requests-like wrapper around an httpx client with HTTP/2 enabled"""
+
+    def __init__(self, pool_maxsize):
+        limits = httpx.Limits(max_connections=pool_maxsize, max_keepalive_connections=pool_maxsize)
+        self.client = httpx.Client(http2=True, limits=limits, headers=DEFAULT_HEADERS, follow_redirects=True)
+        # The client keeps its own cookie jar; expose it like requests.Session.cookies
+        self.cookies = self.client.cookies.jar
+
+    def get(self, url, headers=None, timeout=15, stream=False):
+        try:
+            request = self.client.build_request('GET', url, headers=headers, timeout=timeout)
+            response = self.client.send(request, stream=stream)
+        except httpx.HTTPError as e:
+            # Surface transport errors as the requests exceptions callers already handle
+            raise requests.exceptions.ConnectionError(str(e))
+        return HTTP2Response(response)
+
+    def close(self):
+        self.client.close()
+
+
+class HTTP2Response:
+    """Adapts an httpx response to the attributes the tracker uses"""
+
+    def __init__(self, response):
+        self.raw_response = response
+        self.status_code = response.status_code
+        self.headers = response.headers
+        self.url = str(response.url)
+
+    @property
+    def content(self):
+        try:
+            return self.raw_response.read()
+        except httpx.HTTPError as e:
+            # The body can fail too (ReadError, RemoteProtocolError): surface it like a failed request
+            raise requests.exceptions.ConnectionError(str(e))
+
+    def iter_content(self, chunk_size=None):
+        try:
+            yield from self.raw_response.iter_bytes(chunk_size)
+        except httpx.HTTPError as e:
+            raise requests.exceptions.ConnectionError(str(e))
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.exceptions.HTTPError(f"{self.status_code} Error for url: {self.url}", response=self)
+
+    def close(self):
+        self.raw_response.close()
+
+
+class SessionManager:
+    """Hands out one pooled keep-alive session per host, with cookies that persist to disk"""
+
+    def __init__(self, pool_connections=10, pool_maxsize=10, http2=False, cookies_file=None):
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.http2 = http2 and HTTP2_AVAILABLE
+        self.cookies_file = cookies_file
+        self.sessions = {}
+        self.saved_cookies = {}
+        self.lock = threading.Lock()
+        self.load_cookies()
+
+    def new_session(self, host):
+        if self.http2:
+            session = HTTP2Session(self.pool_maxsize)
+        else:
+            session = requests.Session()
+            session.headers.update(DEFAULT_HEADERS)
+            adapter = TimedHTTPAdapter(pool_connections=self.pool_connections, pool_maxsize=self.pool_maxsize)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+        for cookie in self.saved_cookies.get(host, []):
+            session.cookies.set_cookie(create_cookie(**cookie))
+        return session
+
+    def session_for(self, url):
+        """Return the shared session for the host of url, creating it on first use"""
+        host = host_of(url)
+        with self.lock:
+            session = self.sessions.get(host)
+            if session is None:
+                session = self.new_session(host)
+                self.sessions[host] = session
+            return session
+
+    def get(self, url, headers=None, timeout=15, stream=False):
+        """GET url through the pooled session for its host; stream=True defers reading the body"""
+        return self.session_for(url).get(url, headers=headers, timeout=timeout, stream=stream)
+
+    def load_cookies(self):
+        """Load per-retailer cookies saved by a previous run"""
+        if not self.cookies_file or not os.path.exists(self.cookies_file):
+            return
+        try:
+            with open(self.cookies_file, 'r') as f:
+                self.saved_cookies = json.load(f)
+        except (OSError, ValueError):
+            self.saved_cookies = {}
+
+    def save_cookies(self):
+        """Write every host's cookie jar to the cookies file, if any cookie changed since the last save"""
+        if not self.cookies_file:
+            return
+        with self.lock:
+            cookies = dict(self.saved_cookies)
+            for host, session in self.sessions.items():
+                cookies[host] = [{
+                    'name': c.name,
+                    'value': c.value,
+                    'domain': c.domain,
+                    'path': c.path,
+                    'expires': c.expires,
+                    'secure': c.secure
+                } for c in session.cookies]
+            if cookies == self.saved_cookies and os.path.exists(self.cookies_file):
+                return
+        # Replaced atomically, so a crash mid-write never leaves a truncated file
+        temp = self.cookies_file + '.tmp'
+        with open(temp, 'w') as f:
+            json.dump(cookies, f, indent=2)
+        os.replace(temp, self.cookies_file)
+        self.saved_cookies = cookies
+
+    def close(self):
+        with self.lock:
+            for session in self.sessions.values():
+                session.close()
+            self.sessions = {}
@@ -0,0 +1,226 @@
+import json
+import os
+import re
+import threading
+from urllib.parse import urlparse, urlunparse, parse_qsl, urlencode
+
+import soupsieve
+
+# Public suffixes with two labels, so amazon.co.uk registers as amazon.co.uk, not co.uk
+MULTI_PART_SUFFIXES = {
+    'co.uk', 'com.au', 'co.jp', 'com.br', 'com.mx', 'co.in', 'com.sg', 'co.za',
+    'com.tr', 'com.my', 'com.bd', 'com.pk', 'com.np', 'com.lk', 'com.mm', 'com.eg'
+}
+
+DEFAULT_PRICE_PATTERN = r'[\d,]+\.?\d*'
+
+# Consecutive misses on a domain before a selector is moved to the back of the line
+DEMOTE_AFTER = 3
+
+DEFAULT_PROFILES = [
+    {
+        'name': 'amazon',
+        'domains': ['amazon.com', 'amazon.co.uk', 'amazon.de', 'amazon.fr', 'amazon.it', 'amazon.es',
+                    'amazon.ca', 'amazon.in', 'amazon.co.jp', 'amazon.com.au', 'amazon.com.mx',
+                    'amazon.com.br', 'amazon.ae', 'amazon.sa', 'amazon.sg', 'amazon.nl', 'amazon.se',
+                    'amazon.pl', 'amazon.com.tr', 'amazon.eg'],
+        'selectors': [
+            '.a-price-whole',
+            '.a-price.a-text-price.a-size-medium.apexPriceToPay .a-offscreen',
+            '.a-price-range .a-offscreen',
+            'span.a-price.a-text-price.a-size-medium.apexPriceToPay .a-offscreen',
+            '.a-price .a-offscreen',
+            '#corePrice_feature_div .a-price .a-offscreen'
+        ],
+        'scope_classes': 'a-price',
+        'region_markers': ['corePrice', 'apexPriceToPay', 'a-price'],
+        'item_pattern': r'/(?:dp|gp/product|gp/aw/d|exec/obidos/ASIN)/([A-Z0-9]{10})',
+        'item_url': '{scheme}://{host}/dp/{id}'
+    },
+    {
+        'name': 'ebay',
+        'domains': ['ebay.com', 'ebay.co.uk', 'ebay.de', 'ebay.fr', 'ebay.it', 'ebay.es',
+                    'ebay.ca', 'ebay.com.au', 'ebay.ie', 'ebay.at', 'ebay.ch', 'ebay.nl'],
+        'selectors': [
+            '.u-flL.condenseFont',
+            '.notranslate',
+            '.p-price .notranslate',
+            '[data-testid="x-price-primary"] .notranslate'
+        ],
+        'scope_classes': 'notranslate|condenseFont',
+        'region_markers': ['x-price-primary', 'prcIsum'],
+        'item_pattern': r'/itm/(?:[^/]+/)?(\d{9,})',
+        'item_url': '{scheme}://{host}/itm/{id}'
+    },
+    {
+        'name': 'daraz',
+        'domains': ['daraz.pk', 'daraz.com.bd', 'daraz.lk', 'daraz.com.np', 'daraz.com.mm'],
+        'selectors': [
+            '.pdp-product-price .pdp-price',
+            '.price-box .price',
+            '.current-price'
+        ],
+        'scope_classes': 'price',
+        'region_markers': ['pdp-product-price', 'pdp-price'],
+        'item_pattern': r'-i(\d+)(?:-s\d+)?\.html'
+    }
+]
+
+
+def registered_domain(url):
+    """Registered domain of a URL or host name, e.g. 'smile.amazon.co.uk' -> 'amazon.co.uk'"""
+    host = (urlparse(url).hostname if '//' in url else url) or ''
+    labels = host.lower().rstrip('.').split('.')
+    size = 3 if '.'.join(labels[-2:]) in MULTI_PART_SUFFIXES else 2
+    return '.'.join(labels[-size:])
+
+
+def canonical_url(url):
+    """Normalised form of a URL used to spot the same page added twice
+
+    Lower-cases scheme and host, drops default ports, fragments and a trailing
+    slash, and sorts the query string.
+    """
+    parts = urlparse(url.strip())
+    scheme = parts.scheme.lower() or 'https'
+    host = (parts.hostname or '').rstrip('.')
+    if parts.port and parts.port != {'http': 80, 'https': 443}.get(scheme):
+        host += f':{parts.port}'
+    path = parts.path.rstrip('/') or '/'
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunparse((scheme, host, path, '', query, ''))
+
+
+class CompiledSelector:
+    """A CSS selector compiled once for bs4, with its source kept for other backends"""
+
+    def __init__(self, css):
+        self.css = css
+        self.compiled = soupsieve.compile(css)
+
+    def __repr__(self):
+        return f"CompiledSelector({self.css!r})"
+
+
+class SiteProfile:
+    """Compiled selectors, price pattern and page markers for one retailer
+
+    item_pattern finds the retailer's item id in a URL path (group 1) and
+    item_url, if given, builds the page to fetch for it from {scheme}, {host}
+    and {id}.
+    """
+
+    def __init__(self, name, domains, selectors, price_pattern=DEFAULT_PRICE_PATTERN,
+                 scope_classes=None, region_markers=(), item_pattern=None, item_url=None):
+        self.name = name
+        self.domains = [registered_domain(domain) for domain in domains]
+        self.selectors = [CompiledSelector(css) for css in selectors]
+        self.price_re = re.compile(price_pattern)
+        self.scope_re = re.compile(scope_classes) if scope_classes else None
+        self.region_markers = [marker.encode() for marker in region_markers]
+        self.item_re = re.compile(item_pattern) if item_pattern else None
+        self.item_url = item_url
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['name'], data['domains'], data['selectors'],
+                   price_pattern=data.get('price_pattern', DEFAULT_PRICE_PATTERN),
+                   scope_classes=data.get('scope_classes'),
+                   region_markers=data.get('region_markers', ()),
+                   item_pattern=data.get('item_pattern'),
+                   item_url=data.get('item_url'))
+
+
+class SiteRegistry:
+    """Looks up site profiles by registered domain and learns which selectors work
+
+    Each domain keeps its own selector order: a selector that finds the price
+    moves to the front, and one that misses DEMOTE_AFTER times in a row moves to
+    the back. The selector that last worked for a URL is always tried first.
+    """
+
+    def __init__(self, profiles=()):
+        self.by_name = {}
+        self.by_domain = {}
+        self.domain_order = {}
+        self.miss_streaks = {}
+        self.url_hits = {}
+        self.lock = threading.Lock()
+        for profile in profiles:
+            self.register(profile)
+
+    @classmethod
+    def load(cls, path=None):
+        """Built-in profiles plus any from a JSON file ({"profiles": [...]}); file entries win"""
+        profiles = {data['name']: data for data in DEFAULT_PROFILES}
+        if path and os.path.exists(path):
+            with open(path, 'r') as f:
+                for data in json.load(f).get('profiles', []):
+                    profiles[data['name']] = data
+        return cls(SiteProfile.from_dict(data) for data in profiles.values())
+
+    def register(self, profile):
+        self.by_name[profile.name] = profile
+        for domain in profile.domains:
+            self.by_domain[domain] = profile
+
+    def get(self, name):
+        return self.by_name.get(name)
+
+    def profile_for(self, url):
+        """The profile for the registered domain of url, or None for generic sites"""
+        return self.by_domain.get(registered_domain(url))
+
+    def fetch_key(self, url):
+        """(key, url to fetch) shared by every URL of the same retailer item
+
+        URLs that differ only by slug, ref= or tracking parameters map to one key;
+        pages without a recognised item id fall back to their canonical URL.
+        """
+        profile = self.profile_for(url)
+        parts = urlparse(url)
+        match = profile.item_re.search(parts.path) if profile and profile.item_re else None
+        if match is None:
+            return canonical_url(url), url
+
+        item_id = match.group(1)
+        if profile.item_url:
+            fetch_url = profile.item_url.format(scheme=parts.scheme.lower() or 'https',
+                                                host=(parts.hostname or '').lower(), id=item_id)
+        else:
+            fetch_url = urlunparse(parts._replace(query='', fragment=''))
+        return f"{profile.name}:{registered_domain(url)}:{item_id}", fetch_url
+
+    def ordered_selectors(self, profile, url):
+        """Selectors for url, best candidates first"""
+        with self.lock:
+            order = self.domain_order.get(registered_domain(url), profile.selectors)
+            hint = self.url_hits.get(url)
+        if hint is not None and order[0] is not hint:
+            order = [hint] + [selector for selector in order if selector is not hint]
+        return order
+
+    def last_hit(self, url):
+        """css of the selector that last found the price on url, or None"""
+        with self.lock:
+            hit = self.url_hits.get(url)
+        return hit.css if hit is not None else None
+
+    def record(self, profile, url, hit, missed):
+        """Learn from one extraction: the selector that hit and the ones tried before it"""
+        domain = registered_domain(url)
+        with self.lock:
+            order = list(self.domain_order.get(domain, profile.selectors))
+            for selector in missed:
+                key = (domain, selector.css)
+                self.miss_streaks[key] = self.miss_streaks.get(key, 0) + 1
+                if self.miss_streaks[key] >= DEMOTE_AFTER:
+                    self.miss_streaks[key] = 0
+                    order.remove(selector)
+                    order.append(selector)
+            if hit is not None:
+                self.miss_streaks.pop((domain, hit.css), None)
+                order.remove(hit)
+                order.insert(0, hit)
+                self.url_hits[url] = hit
+            self.domain_order[domain] = order
@@ -0,0 +1,501 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+from price_history import PriceHistory, RECENT_SECONDS, BUCKET_SECONDS
+from site_profiles import canonical_url
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS products (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL,
+    url TEXT NOT NULL UNIQUE,
+    target_price REAL NOT NULL,
+    current_price REAL,
+    last_checked TEXT,
+    alerts_sent INTEGER NOT NULL DEFAULT 0,
+    price_source TEXT,
+    last_alert_at REAL,
+    last_alert_price REAL,
+    next_check_at REAL,
+    lease_owner TEXT,
+    lease_expires REAL,
+    check_failures INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS price_points (
+    product_id INTEGER NOT NULL REFERENCES products(id) ON DELETE CASCADE,
+    ts INTEGER NOT NULL,
+    price REAL NOT NULL,
+    PRIMARY KEY (product_id, ts)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS price_rollups (
+    product_id INTEGER NOT NULL REFERENCES products(id) ON DELETE CASCADE,
+    bucket INTEGER NOT NULL,
+    low REAL NOT NULL,
+    high REAL NOT NULL,
+    last REAL NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (product_id, bucket)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS page_cache (
+    url TEXT PRIMARY KEY,
+    etag TEXT,
+    last_modified TEXT,
+    hash TEXT,
+    price REAL,
+    tier TEXT,
+    whole_page INTEGER NOT NULL DEFAULT 0
+) WITHOUT ROWID;
+"""
+
+SCHEMA_VERSION = 5
+
+# Fold full-resolution points older than RECENT_SECONDS into daily rollups
+COMPACT_SQL = """
+INSERT INTO price_rollups (product_id, bucket, low, high, last, count)
+SELECT product_id, ts / :bucket * :bucket, MIN(price), MAX(price),
+       (SELECT p2.price FROM price_points p2
+        WHERE p2.product_id = p.product_id AND p2.ts < :cutoff AND p2.ts / :bucket = p.ts / :bucket
+        ORDER BY p2.ts DESC LIMIT 1),
+       COUNT(*)
+FROM price_points p WHERE ts < :cutoff GROUP BY product_id, ts / :bucket
+ON CONFLICT (product_id, bucket) DO UPDATE SET
+    low = MIN(low, excluded.low), high = MAX(high, excluded.high),
+    last = excluded.last, count = count + excluded.count
+"""
+COMPACT_EVERY = 3600
+
+PRODUCT_COLUMNS = ('name', 'url', 'target_price', 'current_price', 'last_checked', 'alerts_sent', 'price_source',
+                   'last_alert_at', 'last_alert_price')
+
+# Columns added to products in schemas 3 to 5; older databases get them from upgrade_schema()
+ADDED_COLUMNS = (('last_alert_at', 'REAL'), ('last_alert_price', 'REAL'),
+                 ('next_check_at', 'REAL'), ('lease_owner', 'TEXT'), ('lease_expires', 'REAL'),
+                 ('check_failures', 'INTEGER NOT NULL DEFAULT 0'))
+# ResponseCache entry fields, stored one row per URL
+PAGE_CACHE_COLUMNS = ('etag', 'last_modified', 'hash', 'price', 'tier', 'whole_page')
+# Work queue state, kept out of the product dicts
+QUEUE_COLUMNS = ('next_check_at', 'lease_owner', 'lease_expires', 'check_failures')
+# Created once upgrade_schema() has added the columns they cover
+INDEXES = "CREATE INDEX IF NOT EXISTS products_due ON products (next_check_at)"
+
+# What a check changes; in worker mode commit() writes only these, so edits made elsewhere survive
+CHECK_COLUMNS = ('current_price', 'last_checked', 'price_source', 'alerts_sent', 'last_alert_at', 'last_alert_price')
+
+# Atomically lease up to :limit due products that nobody else holds
+CLAIM_SQL = """
+UPDATE products SET lease_owner = :owner, lease_expires = :until
+WHERE id IN (SELECT id FROM products
+             WHERE COALESCE(next_check_at, 0) <= :now AND (lease_expires IS NULL OR lease_expires < :now)
+             ORDER BY COALESCE(next_check_at, 0) LIMIT :limit)
+RETURNING id, check_failures
+"""
+
+
+
+def to_epoch(timestamp):
+    """Epoch seconds for an ISO timestamp string (as written by older versions)"""
+    return int(datetime.fromisoformat(timestamp).timestamp())
+
+
+class ProductStore:
+    """SQLite (WAL) storage for products and their price observations
+
+    Changes made during a sweep are buffered with update() and record_price()
+    and written in a single transaction by commit(). Loaded products are
+    indexed by id (by_id, in insertion order) and by canonical URL (by_url);
+    add(), add_many() and remove() keep both indexes in sync with the table.
+
+    Several processes can share one database as a work queue: claim() leases
+    due products to an owner, renew() extends the leases and release() stores
+    their next check time. With owner set, commit() only writes the columns a
+    check changes, and only for products this owner still holds.
+
+    The page_cache table keeps the ResponseCache entries, one row per URL, so
+    saving them only writes the URLs that changed.
+    """
+
+    def __init__(self, db_file):
+        self.db_file = db_file
+        # Other worker processes may hold the write lock for a moment
+        self.conn = sqlite3.connect(db_file, timeout=30, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.lock = threading.Lock()
+        self.dirty = {}
+        self.pending_prices = []
+        self.compacted_at = 0
+        self.by_id = {}
+        self.by_url = {}
+        self.owner = None
+        with self.lock:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("PRAGMA synchronous=NORMAL")
+            self.conn.execute("PRAGMA foreign_keys=ON")
+            self.conn.executescript(SCHEMA)
+            self.upgrade_schema()
+            self.conn.execute(INDEXES)
+
+    def upgrade_schema(self):
+        """Bring older databases up to SCHEMA_VERSION
+
+        Schema 1 kept ISO-timestamped rows in price_history (moved to price_points);
+        schema 2 lacked the alert throttling columns, schema 3 the work queue ones
+        and schema 4 the failure count workers hand on with a released product.
+        """
+        version = self.conn.execute("PRAGMA user_version").fetchone()[0]
+        if version >= SCHEMA_VERSION:
+            return
+        with self.conn:
+            legacy = self.conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'price_history'").fetchone()
+            if legacy:
+                rows = self.conn.execute("SELECT product_id, timestamp, price FROM price_history").fetchall()
+                self.conn.executemany(
+                    "INSERT OR REPLACE INTO price_points (product_id, ts, price) VALUES (?, ?, ?)",
+                    [(row[0], to_epoch(row[1]), row[2]) for row in rows]
+                )
+                self.conn.execute("DROP TABLE price_history")
+            existing = {row[1] for row in self.conn.execute("PRAGMA table_info(products)")}
+            for column, kind in ADDED_COLUMNS:
+                if column not in existing:
+                    self.conn.execute(f"ALTER TABLE products ADD COLUMN {column} {kind}")
+            self.conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def is_empty(self):
+        with self.lock:
+            return self.conn.execute("SELECT 1 FROM products LIMIT 1").fetchone() is None
+
+    def index(self, product):
+        self.by_id[product['id']] = product
+        self.by_url[canonical_url(product['url'])] = product
+
+    def get(self, product_id):
+        """Loaded product with this id, or None"""
+        return self.by_id.get(product_id)
+
+    def find_url(self, url):
+        """Loaded product whose URL is the same page as url, or None"""
+        return self.by_url.get(canonical_url(url))
+
+    def load_products(self):
+        """All products as dicts, each with its full PriceHistory (also rebuilds the indexes)"""
+        with self.lock:
+            products = self.read_products()
+        self.by_id, self.by_url = {}, {}
+        for product in products:
+            self.index(product)
+        return products
+
+    def read_products(self, ids=None):
+        """Products (all, or those with the given ids) with their histories; the caller holds the lock"""
+        def where(column):
+            return f"WHERE {column} IN ({', '.join('?' * len(ids))}) " if ids is not None else ""
+        params = ids or ()
+        rows = self.conn.execute(f"SELECT * FROM products {where('id')}ORDER BY id", params).fetchall()
+        rollups = self.conn.execute(
+            f"SELECT product_id, bucket, low, high, last, count FROM price_rollups {where('product_id')}"
+            "ORDER BY product_id, bucket", params
+        ).fetchall()
+        points = self.conn.execute(
+            f"SELECT product_id, ts, price FROM price_points {where('product_id')}ORDER BY product_id, ts", params
+        ).fetchall()
+
+        products = {}
+        for row in rows:
+            product = {key: row[key] for key in row.keys() if key not in QUEUE_COLUMNS}
+            product['price_history'] = PriceHistory()
+            products[product['id']] = product
+        for product_id, bucket, low, high, last, count in rollups:
+            products[product_id]['price_history'].add_rollup(bucket, low, high, last, count)
+        for product_id, ts, price in points:
+            products[product_id]['price_history'].append(price, ts)
+        return list(products.values())
+
+    def claim(self, owner, limit, lease_seconds, now=None):
+        """Lease up to limit due, unleased products to owner
+
+        Returns them freshly loaded and indexed, with {product id: consecutive
+        check failures} as stored by the last release().
+        """
+        now = time.time() if now is None else now
+        with self.lock:
+            with self.conn:
+                failures = {row[0]: row[1] for row in self.conn.execute(
+                    CLAIM_SQL, {'owner': owner, 'until': now + lease_seconds, 'now': now, 'limit': limit})}
+            if not failures:
+                return [], {}
+            products = self.read_products(list(failures))
+            for product in products:
+                self.index(product)
+        return products, failures
+
+    def renew(self, owner, ids, lease_seconds, now=None):
+        """Extend owner's leases on ids; returns how many are still held"""
+        now = time.time() if now is None else now
+        with self.lock, self.conn:
+            return self.conn.executemany(
+                "UPDATE products SET lease_expires = ? WHERE id = ? AND lease_owner = ?",
+                [(now + lease_seconds, product_id, owner) for product_id in ids]
+            ).rowcount
+
+    def release(self, owner, next_checks):
+        """Store {product id: (next check epoch, consecutive check failures)} and drop owner's leases on those products"""
+        with self.lock, self.conn:
+            self.conn.executemany(
+                "UPDATE products SET next_check_at = ?, check_failures = ?, lease_owner = NULL, lease_expires = NULL "
+                "WHERE id = ? AND lease_owner = ?",
+                [(due, failures, product_id, owner) for product_id, (due, failures) in next_checks.items()]
+            )
+
+    def make_all_due(self):
+        """Queue every product for an immediate check"""
+        with self.lock, self.conn:
+            self.conn.execute("UPDATE products SET next_check_at = NULL")
+
+    def due_count(self, now=None):
+        """Products whose check is due, leased or not"""
+        now = time.time() if now is None else now
+        with self.lock:
+            return self.conn.execute(
+                "SELECT COUNT(*) FROM products WHERE COALESCE(next_check_at, 0) <= ?", (now,)).fetchone()[0]
+
+    def seconds_until_due(self, now=None):
+        """Seconds until the next product in the shared queue is due (None if there are no products)"""
+        now = time.time() if now is None else now
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT MIN(MAX(COALESCE(next_check_at, 0), COALESCE(lease_expires, 0))) FROM products").fetchone()
+        return None if row[0] is None else max(0, row[0] - now)
+
+    def insert_history(self, product_id, history):
+        buckets, lows, highs, lasts, counts = history.rollups()
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO price_rollups (product_id, bucket, low, high, last, count) VALUES (?, ?, ?, ?, ?, ?)",
+            [(product_id, *rollup) for rollup in zip(buckets, lows, highs, lasts, counts)]
+        )
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO price_points (product_id, ts, price) VALUES (?, ?, ?)",
+            [(product_id, ts, price) for ts, price in history.points()]
+        )
+
+    def add(self, product):
+        """Insert a new product (and any history it already has); sets product['id']"""
+        with self.lock, self.conn:
+            cursor = self.conn.execute(
+                f"INSERT INTO products ({', '.join(PRODUCT_COLUMNS)}) VALUES ({', '.join('?' * len(PRODUCT_COLUMNS))})",
+                [product.get(column) for column in PRODUCT_COLUMNS]
+            )
+            product['id'] = cursor.lastrowid
+            self.insert_history(product['id'], product['price_history'])
+            self.index(product)
+        return product['id']
+
+    def add_many(self, products):
+        """Insert products from any iterable in one transaction; returns those added
+
+        Products whose canonical URL is already tracked, or appeared earlier in
+        products, are skipped. Nothing is added if the transaction fails.
+        """
+        added = []
+        columns = ', '.join(PRODUCT_COLUMNS)
+        placeholders = ', '.join('?' * len(PRODUCT_COLUMNS))
+        with self.lock:
+            try:
+                with self.conn:
+                    for product in products:
+                        if canonical_url(product['url']) in self.by_url:
+                            continue
+                        cursor = self.conn.execute(f"INSERT INTO products ({columns}) VALUES ({placeholders})",
+                                                   [product.get(column) for column in PRODUCT_COLUMNS])
+                        product['id'] = cursor.lastrowid
+                        self.insert_history(product['id'], product['price_history'])
+                        self.index(product)
+                        added.append(product)
+            except BaseException:
+                for product in added:
+                    self.by_id.pop(product['id'], None)
+                    self.by_url.pop(canonical_url(product['url']), None)
+                raise
+        return added
+
+    def remove(self, product):
+        """Delete a product and its price history"""
+        with self.lock, self.conn:
+            self.conn.execute("DELETE FROM products WHERE id = ?", (product['id'],))
+            self.by_id.pop(product['id'], None)
+            if self.by_url.get(canonical_url(product['url'])) is product:
+                del self.by_url[canonical_url(product['url'])]
+            self.dirty.pop(product['id'], None)
+            self.pending_prices = [p for p in self.pending_prices if p[0] != product['id']]
+
+    def update(self, product):
+        """Mark a product's row as changed; written on the next commit()"""
+        with self.lock:
+            self.dirty[product['id']] = product
+
+    def record_price(self, product, price, timestamp):
+        """Buffer a price observation (epoch seconds); written on the next commit()"""
+        with self.lock:
+            self.pending_prices.append((product['id'], int(timestamp), price))
+
+    def commit(self):
+        """Write all buffered product updates and observations in one transaction
+
+        Rows that can never be written (say an observation of a product removed
+        meanwhile) are dropped so they cannot make every later commit fail too.
+        On any other error (the database busy or locked by another process) the
+        buffers are kept for the next commit.
+        """
+        with self.lock:
+            compact = time.time() - self.compacted_at > COMPACT_EVERY
+            if not self.dirty and not self.pending_prices and not compact:
+                return
+            try:
+                self.write_buffered(compact)
+            except sqlite3.IntegrityError:
+                # A constraint only aborts its own statement: write the rows one by one, skipping the bad ones
+                self.write_buffered(compact, skip_invalid=True)
+            self.dirty = {}
+            self.pending_prices = []
+
+    def write_buffered(self, compact, skip_invalid=False):
+        """Write the buffered updates and observations (caller holds the lock)
+
+        With skip_invalid every row is its own statement and rows violating a
+        constraint are left out; otherwise the first one fails the transaction.
+        """
+        columns = PRODUCT_COLUMNS if self.owner is None else CHECK_COLUMNS
+        assignments = ', '.join(f"{column} = ?" for column in columns)
+        # A worker whose lease lapsed leaves the row and its observations to the worker that took over
+        guard, extra = ("", []) if self.owner is None else (" AND lease_owner = ?", [self.owner])
+        statements = [(f"UPDATE products SET {assignments} WHERE id = ?{guard}",
+                       [[product.get(column) for column in columns] + [product_id] + extra
+                        for product_id, product in self.dirty.items()])]
+        if self.owner is None:
+            statements.append(("INSERT OR REPLACE INTO price_points (product_id, ts, price) VALUES (?, ?, ?)",
+                               self.pending_prices))
+        else:
+            statements.append(("INSERT OR REPLACE INTO price_points (product_id, ts, price) SELECT ?, ?, ? "
+                               "WHERE EXISTS (SELECT 1 FROM products WHERE id = ? AND lease_owner = ?)",
+                               [(product_id, ts, price, product_id, self.owner)
+                                for product_id, ts, price in self.pending_prices]))
+        with self.conn:
+            for sql, rows in statements:
+                if not skip_invalid:
+                    self.conn.executemany(sql, rows)
+                    continue
+                for row in rows:
+                    try:
+                        self.conn.execute(sql, row)
+                    except sqlite3.IntegrityError:
+                        pass
+            if compact:
+                self.compact()
+
+    def nearest_point(self, product_id, timestamp, window):
+        """(ts, price) of the observation closest to timestamp within window seconds, or None"""
+        with self.lock:
+            return self.conn.execute(
+                "SELECT ts, price FROM price_points WHERE product_id = ? AND ts BETWEEN ? AND ? "
+                "ORDER BY ABS(ts - ?) LIMIT 1",
+                (product_id, int(timestamp - window), int(timestamp + window), int(timestamp))
+            ).fetchone()
+
+    def put_points(self, points):
+        """Insert or overwrite (product_id, ts, price) observations in one transaction"""
+        with self.lock, self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO price_points (product_id, ts, price) VALUES (?, ?, ?)",
+                [(product_id, int(ts), price) for product_id, ts, price in points]
+            )
+
+    def read_page_cache(self):
+        """{url: ResponseCache entry} of every cached page"""
+        with self.lock:
+            rows = self.conn.execute(f"SELECT url, {', '.join(PAGE_CACHE_COLUMNS)} FROM page_cache").fetchall()
+        return {row['url']: {**{column: row[column] for column in PAGE_CACHE_COLUMNS},
+                             'whole_page': bool(row['whole_page'])} for row in rows}
+
+    def put_page_cache(self, entries):
+        """Insert or overwrite {url: ResponseCache entry} in one transaction"""
+        if not entries:
+            return
+        with self.lock, self.conn:
+            self.conn.executemany(
+                f"INSERT OR REPLACE INTO page_cache (url, {', '.join(PAGE_CACHE_COLUMNS)}) "
+                f"VALUES (?, {', '.join('?' * len(PAGE_CACHE_COLUMNS))})",
+                [[url] + [entry.get(column) for column in PAGE_CACHE_COLUMNS[:-1]] + [bool(entry.get('whole_page'))]
+                 for url, entry in entries.items()]
+            )
+
+    def rollup(self, product_id, bucket):
+        """(low, high, last, count) of a product's daily rollup starting at bucket, or None"""
+        with self.lock:
+            return self.conn.execute(
+                "SELECT low, high, last, count FROM price_rollups WHERE product_id = ? AND bucket = ?",
+                (product_id, bucket)
+            ).fetchone()
+
+    def put_rollups(self, rollups):
+        """Insert or overwrite (product_id, bucket, low, high, last, count) daily rollups in one transaction"""
+        with self.lock, self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO price_rollups (product_id, bucket, low, high, last, count) "
+                "VALUES (?, ?, ?, ?, ?, ?)", rollups
+            )
+
+    def reload_histories(self, products):
+        """Re-read the price histories of loaded products in place, keeping the product dicts"""
+        with self.lock:
+            fresh = {product['id']: product for product in self.read_products([p['id'] for p in products])}
+        for product in products:
+            if product['id'] in fresh:
+                product['price_history'] = fresh[product['id']]['price_history']
+
+    @staticmethod
+    def compaction_cutoff(now=None):
+        """Epoch before which observations live in daily rollups only"""
+        cutoff = int(time.time() if now is None else now) - RECENT_SECONDS
+        # Only whole days, so a bucket is never split between the two tiers
+        return cutoff // BUCKET_SECONDS * BUCKET_SECONDS
+
+    def compact(self):
+        """Roll expired full-resolution points into daily rollups (caller holds the lock)"""
+        cutoff = self.compaction_cutoff()
+        self.conn.execute(COMPACT_SQL, {'cutoff': cutoff, 'bucket': BUCKET_SECONDS})
+        self.conn.execute("DELETE FROM price_points WHERE ts < ?", (cutoff,))
+        self.compacted_at = time.time()
+
+    def migrate_json(self, json_file):
+        """One-time import of the old tracked_products.json; returns the number of products moved"""
+        if not os.path.exists(json_file) or not self.is_empty():
+            return 0
+        with open(json_file, 'r') as f:
+            products = json.load(f)
+
+        moved = 0
+        with self.lock, self.conn:
+            for product in products:
+                cursor = self.conn.execute(
+                    f"INSERT OR IGNORE INTO products ({', '.join(PRODUCT_COLUMNS)}) VALUES ({', '.join('?' * len(PRODUCT_COLUMNS))})",
+                    [product.get(column, 0 if column == 'alerts_sent' else None) for column in PRODUCT_COLUMNS]
+                )
+                if not cursor.rowcount:
+                    continue  # duplicate URL
+                moved += 1
+                self.conn.executemany(
+                    "INSERT OR REPLACE INTO price_points (product_id, ts, price) VALUES (?, ?, ?)",
+                    [(cursor.lastrowid, to_epoch(point['timestamp']), point['price'])
+                     for point in product.get('price_history', [])]
+                )
+
+        # Keep the old file around as a backup, but never import it twice
+        os.replace(json_file, json_file + '.migrated')
+        return moved
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
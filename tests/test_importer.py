@@ -0,0 +1,56 @@
+import json
+
+from importer import ProductListReader
+from tracker_core import TrackerEngine
+
+
+def test_mixed_type_rows_are_reported_not_raised(tmp_path):
+    path = tmp_path / "products.jsonl"
+    rows = [
+        {"url": "example.com/a", "target_price": 5},
+        {"url": 123, "target_price": 5},
+        {"url": "example.com/b", "name": ["not", "text"], "target_price": 5},
+        {"url": None, "target_price": 5},
+        {"url": "example.com/c", "name": "C", "target_price": "$1,200.50"},
+        [1, 2, 3],
+        {"url": "example.com/d", "target_price": float("nan")},
+    ]
+    path.write_text("\n".join(json.dumps(row) for row in rows) + "\n{broken\n", encoding="utf-8")
+
+    reader = ProductListReader(str(path))
+    parsed = list(reader)
+
+    assert parsed == [("example.com/a", "https://example.com/a", 5.0),
+                      ("C", "https://example.com/c", 1200.5)]
+    assert reader.rows == 8
+    assert reader.invalid == 6
+    assert reader.errors[0] == "line 2: url must be a string, got int"
+    assert reader.errors[1] == "line 3: name must be a string, got list"
+
+
+def test_csv_rows(tmp_path):
+    path = tmp_path / "products.csv"
+    path.write_text("URL,Target_Price,Name\nexample.com/a,10,A\n,5,B\nexample.com/c,-1,C\n", encoding="utf-8")
+
+    reader = ProductListReader(str(path))
+
+    assert list(reader) == [("A", "https://example.com/a", 10.0)]
+    assert reader.invalid == 2
+
+
+def test_import_inserts_in_chunks_and_skips_duplicates_across_them(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    path = tmp_path / "products.csv"
+    urls = ["example.com/a", "example.com/b", "example.com/c", "https://example.com/a/", "example.com/d"]
+    path.write_text("url,target_price\n" + "".join(f"{url},10\n" for url in urls), encoding="utf-8")
+    engine = TrackerEngine(db_file=str(tmp_path / "products.db"))
+    engine.import_chunk_size = 2
+    try:
+        added = engine.import_products(str(path), fetch_prices=False)
+
+        assert [product['url'] for product in added] == \
+            ["https://example.com/a", "https://example.com/b", "https://example.com/c", "https://example.com/d"]
+        assert len(engine.products) == 4
+        assert len(engine.scheduler) == 4
+    finally:
+        engine.close()
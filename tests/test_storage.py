@@ -0,0 +1,63 @@
+import json
+import sqlite3
+import time
+
+import pytest
+
+from price_history import PriceHistory
+from storage import ProductStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = ProductStore(str(tmp_path / "products.db"))
+    yield store
+    store.close()
+
+
+def add_product(store, url="https://example.com/a"):
+    product = {'name': 'A', 'url': url, 'target_price': 5.0, 'alerts_sent': 0, 'price_history': PriceHistory()}
+    store.add(product)
+    return product
+
+
+def points(store):
+    return [tuple(row) for row in store.conn.execute("SELECT product_id, price FROM price_points ORDER BY ts")]
+
+
+def test_commit_drops_only_rows_that_violate_constraints(store):
+    product = add_product(store)
+    store.record_price(product, 4.0, time.time())
+    store.pending_prices.append((product['id'] + 100, int(time.time()), 1.0))  # no such product
+
+    store.commit()
+
+    assert points(store) == [(product['id'], 4.0)]
+    assert store.pending_prices == []
+
+
+def test_commit_keeps_buffers_while_the_database_is_locked(store, tmp_path):
+    product = add_product(store)
+    store.conn.execute("PRAGMA busy_timeout = 50")
+    other = sqlite3.connect(str(tmp_path / "products.db"))
+    other.execute("BEGIN IMMEDIATE")
+    store.record_price(product, 3.0, time.time())
+
+    with pytest.raises(sqlite3.OperationalError):
+        store.commit()
+    assert len(store.pending_prices) == 1
+
+    other.rollback()
+    other.close()
+    store.commit()
+    assert points(store) == [(product['id'], 3.0)]
+
+
+def test_migrate_json_counts_only_the_products_inserted(store, tmp_path):
+    json_file = tmp_path / "tracked_products.json"
+    product = {'name': 'A', 'url': 'https://example.com/a', 'target_price': 5.0,
+               'price_history': [{'timestamp': '2024-01-01T00:00:00', 'price': 6.0}]}
+    json_file.write_text(json.dumps([product, dict(product, name='A again')]))
+
+    assert store.migrate_json(str(json_file)) == 1
+    assert points(store) == [(1, 6.0)]
@@ -0,0 +1,81 @@
+import pytest
+
+from tracker_core import TrackerEngine
+
+URL = "https://www.amazon.com/dp/B000000001"
+
+# A related-items carousel with its own a-price sits long before the main price
+AMAZON_PAGE = (
+    b"<html><head><title>Item</title></head><body>"
+    b'<div class="carousel"><span class="a-price"><span class="a-offscreen">$5.00</span></span></div>'
+    + b"<p>" + b"filler " * 6000 + b"</p>"
+    + b'<div id="corePrice_feature_div"><span class="a-price"><span class="a-price-whole">249.</span>'
+      b'<span class="a-offscreen">$249.00</span></span></div>'
+      b"</body></html>"
+)
+
+
+class FakeResponse:
+    status_code = 200
+
+    def __init__(self, body):
+        self.body = body
+        self.headers = {}
+
+    @property
+    def content(self):
+        return self.body
+
+    def iter_content(self, chunk_size):
+        for start in range(0, len(self.body), chunk_size):
+            yield self.body[start:start + chunk_size]
+
+    def raise_for_status(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class FakeSessions:
+    def __init__(self, body):
+        self.body = body
+        self.requests = 0
+
+    def get(self, url, headers=None, timeout=15, stream=False):
+        self.requests += 1
+        return FakeResponse(self.body)
+
+    def save_cookies(self):
+        pass
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def engine(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    engine = TrackerEngine(db_file=str(tmp_path / "products.db"))
+    engine.parser_pool.workers = 0
+    engine.sessions = FakeSessions(AMAZON_PAGE)
+    yield engine
+    engine.close()
+
+
+@pytest.mark.parametrize("workers", [0, 1])
+def test_carousel_price_in_cut_off_page_is_not_trusted(engine, workers):
+    engine.parser_pool.workers = workers
+
+    assert engine.fetch_page(URL) == (249.0, 'site-selector')
+    # The cut-off read was distrusted and the page read again whole
+    assert engine.sessions.requests == 2
+    assert engine.page_cache.whole_page(URL)
+    assert engine.site_registry.ordered_selectors(engine.site_registry.profile_for(URL), URL)[0].css \
+        == '.a-price-whole'
+
+
+def test_whole_page_and_streamed_read_agree(engine):
+    engine.stream_pages = False
+    assert engine.fetch_page(URL) == (249.0, 'site-selector')
+    assert engine.sessions.requests == 1
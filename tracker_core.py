@@ -0,0 +1,1003 @@
+import argparse
+import itertools
+import logging
+import multiprocessing
+import os
+import signal
+import socket
+import sqlite3
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from datetime import datetime
+
+import requests
+
+from fetcher import (HostRateLimiter, HostHealth, FetchEngine, RequestCoalescer, CircuitOpenError, backoff_delay,
+                     host_of)
+from sessions import HTTP2_AVAILABLE, SessionManager, connect_seconds
+from page_cache import ResponseCache, read_price_region
+from extractors import extract_structured_price, extract_dom_price, run_dom_tiers, resolve_backend
+from site_profiles import SiteRegistry
+from storage import ProductStore
+from price_history import BUCKET_SECONDS, PriceHistory
+from scheduler import AdaptiveScheduler
+from parse_pool import ParserPool
+from alerts import AlertDispatcher, CallbackSink, LogFileSink, WebhookSink, SmtpSink, describe
+from metrics import Metrics, SweepProfiler
+from archive import PageArchive, MATCH_WINDOW
+from analytics import CatalogueAnalytics, np
+from importer import ProductListReader, normalize_url
+
+
+def new_product(name, url, target_price, current_price=None, tier=None, last_checked=None):
+    """Product dict for a product that is not stored yet"""
+    return {
+        'name': name,
+        'url': url,
+        'target_price': target_price,
+        'current_price': current_price,
+        'last_checked': last_checked,
+        'alerts_sent': 0,
+        'price_source': tier,
+        'last_alert_at': None,
+        'last_alert_price': None,
+        'price_history': PriceHistory()
+    }
+
+
+def is_host_failure(error):
+    """Whether a request error says the host is down, overloaded or blocking us"""
+    if isinstance(error, requests.exceptions.HTTPError) and error.response is not None:
+        status = error.response.status_code
+        return status in (403, 429) or status >= 500
+    return isinstance(error, (requests.exceptions.ConnectionError, requests.exceptions.Timeout,
+                              requests.exceptions.ChunkedEncodingError))
+
+
+class TrackerEngine:
+    """Fetch, extract, store and alert logic shared by the GUI and the headless daemon
+
+    The engine never touches tkinter. Front ends plug in through callbacks that
+    may be called from worker threads: log(message), on_alert(digest) with a list
+    of alert dicts, on_progress(done, total) during checks, and on_change(changed)
+    after products were updated, where changed lists the updated products or is
+    None when products were added or removed. Extra alert sinks (log file,
+    webhook, email) can be passed in alert_sinks.
+    """
+
+    def __init__(self, db_file="tracked_products.db", data_file="tracked_products.json",
+                 log=None, on_alert=None, on_change=None, on_progress=None, alert_sinks=()):
+        self.log_message = log or (lambda message: None)
+        self.on_alert = on_alert or (lambda digest: None)
+        self.on_change = on_change or (lambda changed=None: None)
+        self.on_progress = on_progress or (lambda done, total: None)
+
+        # Serialises changes to the product list and checks from different threads
+        self.lock = threading.RLock()
+
+        # Data storage; the store keeps the products indexed by id and canonical URL
+        self.store = None
+        self.migrated = 0
+        self.data_file = data_file  # legacy format, migrated on first run
+        self.db_file = db_file
+        self.check_interval = 30  # minutes; the base each product's adaptive interval starts from
+
+        # Per-phase timings and counters; metrics_file is rewritten after every sweep and
+        # profile_file, when set, gets a cProfile dump of the next sweep
+        self.metrics = Metrics()
+        self.metrics_file = None
+        self.profile_file = None
+
+        # Fetching: a per-host politeness delay and a pool of concurrent workers
+        self.request_delay = 2  # seconds between requests to the same host
+        self.max_workers = 8
+        self.rate_limiter = HostRateLimiter(delay=self.request_delay)
+        # Failing hosts are paused by a circuit breaker; timeouts follow each host's latency
+        self.host_health = HostHealth(log=self.log_message)
+        self.max_retries = 2
+        self.fetch_engine = FetchEngine(self.fetch_price, self.rate_limiter, max_workers=self.max_workers,
+                                        health=self.host_health, metrics=self.metrics)
+        # Products showing the same retailer item share one fetch (see SiteRegistry.fetch_key)
+        self.coalescer = RequestCoalescer()
+
+        # Per-product next-check times, adapted to volatility, target distance and failures
+        self.scheduler = AdaptiveScheduler(min_interval=5 * 60, max_interval=24 * 3600)
+        self.batch_size = self.max_workers * 4
+        # Imported products are inserted import_chunk_size per transaction and get their first
+        # check import_batch_size at a time, so other checks and the GUI can interleave
+        self.import_chunk_size = 1000
+        self.import_batch_size = 200
+        # In multi-worker mode (run_worker) claimed products are leased for this long, renewed while checked
+        self.lease_seconds = 300
+
+        # Shared keep-alive sessions, one connection pool per host
+        self.pool_size = self.max_workers
+        # HTTP/2 needs httpx[http2] (see use_http2); requests is used otherwise
+        self.sessions = SessionManager(pool_maxsize=self.pool_size, http2=False, cookies_file="cookies.json")
+
+        # Validators and price-region hashes so unchanged pages are not re-parsed (kept in the store)
+        self.page_cache = ResponseCache()
+
+        # Pages of retailers with known price markers are streamed and cut off once the price is in
+        self.stream_pages = True
+        self.max_page_bytes = 2 * 1024 * 1024
+
+        # Fastest installed HTML parser; scoped parsing only builds price subtrees
+        self.parser_backend = resolve_backend('auto')
+        self.scoped_parsing = True
+
+        # Retailer profiles by registered domain; extra retailers go in site_profiles.json
+        self.site_registry = SiteRegistry.load("site_profiles.json")
+
+        # CPU-bound extraction runs in one worker process per CPU; workers = 0 parses in the fetch threads
+        self.parser_pool = ParserPool(self.site_registry, profiles_file="site_profiles.json")
+
+        # Optional PageArchive of downloaded bodies, replayed by reextract_archive() after extraction fixes
+        self.archive = None
+
+        # Catalogue-wide price statistics (needs numpy); a rebuild reads every history, so checks
+        # trigger one at most every analytics_interval seconds and run() catches up when idle.
+        # report_top > 0 also logs that many best deals after each sweep
+        self.analytics = None
+        self.analytics_interval = 60
+        self.analytics_built_at = None
+        self.analytics_stale = False
+        self.analytics_lock = threading.Lock()
+        self.report_top = 0
+
+        # Alerts are throttled per product, coalesced per sweep and delivered off the check path
+        self.alerts = AlertDispatcher([CallbackSink(self.on_alert), *alert_sinks], log=self.log_message)
+
+        self.load_data()
+        if self.migrated:
+            self.log_message(f"📦 Migrated {self.migrated} products from {self.data_file} to {self.db_file}")
+        self.refresh_analytics()
+
+    @property
+    def products(self):
+        """Tracked products in the order they were added"""
+        return list(self.store.by_id.values()) if self.store is not None else []
+
+    @property
+    def use_http2(self):
+        """Whether pages are fetched over HTTP/2 (only ever true with httpx[http2] installed)"""
+        return self.sessions.http2
+
+    @use_http2.setter
+    def use_http2(self, enabled):
+        # Sessions are built for one protocol, so switching replaces them (cookies carry over on disk)
+        if bool(enabled and HTTP2_AVAILABLE) == self.sessions.http2:
+            return
+        self.sessions.save_cookies()
+        self.sessions.close()
+        self.sessions = SessionManager(pool_maxsize=self.pool_size, http2=enabled,
+                                       cookies_file=self.sessions.cookies_file)
+
+    def get_product(self, product_id):
+        """Product with this id, or None"""
+        return self.store.get(product_id)
+
+    def find_product(self, url):
+        """Tracked product for the same page as url, or None"""
+        return self.store.find_url(url)
+
+    def find_price(self, body, url, complete=True):
+        """Tiered extraction: structured data first, full DOM parse only as a fallback
+
+        Selector misses on a body that is not the complete page are not learned from, and
+        a price found there by any but the first selector tried is reported as a miss.
+        """
+        if self.parser_pool.workers:
+            return self.parser_pool.find_price(body, url, self.parser_backend, self.scoped_parsing, complete)
+
+        price, tier = extract_structured_price(body)
+        if price is not None:
+            return price, tier
+
+        profile = self.site_registry.profile_for(url)
+        return extract_dom_price(body, profile, self.parser_backend, self.scoped_parsing,
+                                 registry=self.site_registry, url=url, complete=complete)
+
+    def fetch_price(self, url):
+        """(price, tier) for url, sharing the request with concurrent checks of the same item"""
+        key, fetch_url = self.site_registry.fetch_key(url)
+        return self.coalescer.run(key, self.fetch_page, fetch_url)
+
+    def fetch_page(self, url):
+        """Download a product page and extract its (price, tier); raises on errors"""
+        profile = self.site_registry.profile_for(url)
+        markers = profile.region_markers if profile and not self.page_cache.whole_page(url) else ()
+        response, body, complete = self.download(url, markers, self.stream_pages and bool(markers))
+
+        host = host_of(url)
+
+        # Not modified since the last check: reuse the price we extracted then
+        if body is None:
+            self.metrics.inc('checks_total', host=host, outcome='not_modified')
+            entry = self.page_cache.not_modified(url)
+            return (entry.get('price'), entry.get('tier')) if entry else (None, None)
+
+        # Skip parsing when the price region of the page hasn't changed
+        entry, digest = self.page_cache.lookup(url, body, markers)
+        if entry is not None:
+            self.metrics.inc('checks_total', host=host, outcome='unchanged')
+            return entry['price'], entry.get('tier')
+
+        started = time.perf_counter()
+        price, tier = self.find_price(body, url, complete)
+        if price is None and not complete:
+            # A marker can appear well before the price (a-price in a carousel, say): read this
+            # page whole from now on
+            self.page_cache.mark_whole_page(url)
+            self.rate_limiter.acquire(url)
+            return self.fetch_page(url)
+        self.metrics.observe('parse_seconds', time.perf_counter() - started, host=host)
+        self.metrics.inc('checks_total', host=host, outcome='parsed' if price is not None else 'no_price')
+        selector = self.site_registry.last_hit(url) if tier == 'site-selector' else None
+        if price is not None:
+            self.metrics.inc('extractions_total', tier=tier, selector=selector or '')
+        self.page_cache.store(url, response.headers, digest, price, tier)
+        if self.archive is not None:
+            try:
+                self.archive.add(self.site_registry.fetch_key(url)[0], url, body, price, tier, selector)
+            except (OSError, sqlite3.Error) as e:
+                self.log_message(f"Error archiving {url}: {str(e)}")
+        return price, tier
+
+    def replay_price(self, body, url):
+        """(price, tier, site selector css) for an archived body, without touching selector learning"""
+        if self.parser_pool.workers:
+            return self.parser_pool.replay(body, url, self.parser_backend, self.scoped_parsing)
+
+        price, tier = extract_structured_price(body)
+        if price is not None:
+            return price, tier, None
+        profile = self.site_registry.profile_for(url)
+        price, tier, hit, _ = run_dom_tiers(body, profile, None, self.parser_backend, self.scoped_parsing)
+        return price, tier, hit.css if hit else None
+
+    def download(self, url, markers=(), stream=False):
+        """GET url, retrying host failures with backoff; return (response, body or None for 304, complete)
+
+        complete is False when a streamed body was cut off after the price region.
+        """
+        attempt = 0
+        while True:
+            self.host_health.allow(url)
+            connect_before = connect_seconds()
+            started = time.monotonic()
+            try:
+                # Always streamed, so waiting for headers and reading the body are timed apart
+                headers = self.page_cache.conditional_headers(url)
+                response = self.sessions.get(url, headers=headers, stream=True,
+                                             timeout=self.host_health.timeout_for(url))
+                headers_at = time.monotonic()
+                try:
+                    body, complete = None, True
+                    if response.status_code == 304 or response.status_code >= 400:
+                        # Read the empty or short body first: closing a response with unread bytes
+                        # drops its keep-alive connection (only a deliberately cut-off stream should)
+                        response.content
+                        response.raise_for_status()
+                    elif stream:
+                        body, complete = read_price_region(
+                            response, markers, self.max_page_bytes,
+                            found=lambda head: extract_structured_price(head)[0] is not None)
+                    else:
+                        body = response.content
+                finally:
+                    response.close()
+            except requests.exceptions.RequestException as e:
+                if not is_host_failure(e):
+                    # The host answered (e.g. 404 for a delisted product); it is not the host's fault
+                    self.host_health.record_success(url, time.monotonic() - started)
+                    raise
+                self.host_health.record_failure(url)
+                if attempt >= self.max_retries or not self.host_health.available(url):
+                    raise
+                time.sleep(backoff_delay(attempt))
+                self.rate_limiter.acquire(url)
+                attempt += 1
+                continue
+            except BaseException:
+                # Anything else (a bad body, an interrupt) says nothing about the host
+                self.host_health.release_probe(url)
+                raise
+            finished = time.monotonic()
+            self.host_health.record_success(url, finished - started)
+            host, connected = host_of(url), connect_seconds() - connect_before
+            self.metrics.observe('connect_seconds', connected, host=host)
+            self.metrics.observe('ttfb_seconds', max(0.0, headers_at - started - connected), host=host)
+            if body is not None:
+                self.metrics.observe('download_seconds', finished - headers_at, host=host)
+                self.metrics.observe('download_bytes', len(body), host=host)
+                self.metrics.inc('bytes_downloaded_total', len(body), host=host)
+            return response, body, complete
+
+    def log_fetch_error(self, url, error):
+        """Log and count a failed fetch the same way for single and bulk checks"""
+        self.metrics.inc('checks_total', host=host_of(url),
+                         outcome='skipped' if isinstance(error, CircuitOpenError) else 'error')
+        if isinstance(error, CircuitOpenError):
+            self.log_message(f"⏸️ Skipped {url}: {str(error)}")
+        elif isinstance(error, requests.exceptions.RequestException):
+            self.log_message(f"Network error for {url}: {str(error)}")
+        else:
+            self.log_message(f"Error parsing price from {url}: {str(error)}")
+
+    def get_product_price(self, url):
+        """Fetch current price of product from URL; returns (price, tier)"""
+        try:
+            key, fetch_url = self.site_registry.fetch_key(url)
+            return self.coalescer.run(key, self.polite_fetch_page, fetch_url)
+
+        except Exception as e:
+            self.log_fetch_error(url, e)
+            return None, None
+
+    def polite_fetch_page(self, url):
+        # Wait for the host's rate limit to be respectful
+        self.rate_limiter.acquire(url)
+        return self.fetch_page(url)
+
+    def add_product(self, name, url, target_price):
+        """Add new product to tracking list; raises ValueError if it is already tracked"""
+        url = normalize_url(url)
+
+        # Check if product already exists
+        if self.find_product(url) is not None:
+            raise ValueError("This product is already being tracked")
+
+        # Try to get initial price
+        self.log_message(f"Checking initial price for {name}...")
+        current_price, tier = self.get_product_price(url)
+
+        product = new_product(name, url, target_price, current_price, tier, datetime.now().isoformat())
+
+        if current_price:
+            product['price_history'].append(current_price)
+
+        with self.lock:
+            self.store.add(product)
+            self.scheduler.reschedule(product, current_price is not None, self.check_interval * 60)
+            self.save_data()
+        self.on_change(None)
+
+        if current_price:
+            self.log_message(f"✅ Added {name} - Current price: ${current_price:.2f}")
+            if current_price <= target_price:
+                self.log_message(f"🎉 Target price already reached for {name}!")
+                self.alert(product)
+        else:
+            self.log_message(f"⚠️ Added {name} - Could not fetch initial price")
+        return product
+
+    def import_products(self, path, fetch_prices=True):
+        """Add every new product listed in a CSV or JSON Lines file; returns the products added
+
+        The file is streamed and parsed without the engine lock, then inserted
+        import_chunk_size products per transaction, taking the lock once per
+        chunk so checks and the GUI carry on meanwhile; URLs already tracked or
+        repeated in the file are skipped. With fetch_prices the new products get
+        their first check here, import_batch_size at a time with progress logged
+        after each batch; otherwise they are queued as due. Raises OSError or
+        ValueError if the file cannot be read (chunks inserted by then are kept).
+        """
+        reader = ProductListReader(path)
+        rows = iter(reader)
+        added = []
+        while True:
+            chunk = [new_product(name, url, target_price)
+                     for name, url, target_price in itertools.islice(rows, self.import_chunk_size)]
+            if not chunk:
+                break
+            with self.lock:
+                inserted = self.store.add_many(chunk)
+                if not fetch_prices:
+                    for product in inserted:
+                        self.scheduler.schedule(product, self.check_interval * 60)
+            added.extend(inserted)
+        self.on_change(None)
+
+        skipped = reader.rows - reader.invalid - len(added)
+        self.log_message(f"📥 Imported {len(added)} products from {path} "
+                         f"({skipped} already tracked, {reader.invalid} invalid rows)")
+        for error in reader.errors:
+            self.log_message(f"   ⚠️ {error}")
+
+        if fetch_prices:
+            for start in range(0, len(added), self.import_batch_size):
+                self.check_products(added[start:start + self.import_batch_size])
+                done = min(start + self.import_batch_size, len(added))
+                self.log_message(f"💲 Initial prices: {done}/{len(added)} imported products checked")
+            self.catch_up_analytics()
+        return added
+
+    def remove_product(self, product):
+        """Stop tracking a product and delete its history"""
+        with self.lock:
+            self.store.remove(product)
+            self.scheduler.remove(product)
+            self.save_data()
+        self.on_change(None)
+        self.log_message(f"🗑️ Removed {product['name']} from tracking")
+
+    def check_all_products(self):
+        """Check prices for all products"""
+        if not self.products:
+            self.log_message("No products to check")
+            return
+
+        self.log_message("🔍 Checking all products...")
+        self.check_products(self.products)
+        self.catch_up_analytics()
+        self.log_message("✅ Finished checking all products")
+
+    def check_products(self, products):
+        """Fetch products concurrently, apply their prices and schedule their next checks"""
+        # One fetch per retailer item; its price fans out to every product showing it
+        groups = {}
+        for product in products:
+            key, _ = self.site_registry.fetch_key(product['url'])
+            groups.setdefault(key, []).append(product)
+
+        profiler = SweepProfiler(self.profile_file) if self.profile_file else None
+        self.profile_file = None
+        started = time.monotonic()
+
+        with self.alerts.batch(), profiler or nullcontext():
+            # Results are applied here as they arrive; the lock is only held while applying one,
+            # so the GUI can add or remove products during the network sweep
+            total = len(products)
+            done = priced = 0
+            for group, result, error in self.fetch_engine.run(list(groups.values()), url_of=lambda group: group[0]['url'],
+                                                              profiler=profiler):
+                if error is not None:
+                    self.log_fetch_error(group[0]['url'], error)
+                    result = (None, None)
+                with self.lock:
+                    for product in group:
+                        done += 1
+                        self.on_progress(done, total)
+                        if self.store.get(product['id']) is not product:
+                            continue  # removed while it was being fetched
+                        if isinstance(error, CircuitOpenError):
+                            # Not a failure of the product: check it again once its host is retried
+                            self.scheduler.push(product, max(error.retry_at, time.time() + self.scheduler.min_interval))
+                            continue
+                        self.log_message(f"Checked ({done}/{total}): {product['name']}")
+                        self.apply_price(product, *result)
+                        self.scheduler.reschedule(product, result[0] is not None, self.check_interval * 60)
+                        priced += result[0] is not None
+
+            with self.lock:
+                self.save_data()
+                # Products removed during the sweep must not get their rows back
+                changed = [product for product in products if self.store.get(product['id']) is product]
+            self.refresh_analytics()
+        self.on_change(changed)
+        self.log_message(self.page_cache.summary())
+        if self.report_top:
+            self.log_deals(self.report_top)
+        if profiler is not None:
+            self.log_message(f"⏱️ Profile of this sweep written to {profiler.path}")
+        self.record_sweep(time.monotonic() - started, priced / total if total else 1.0)
+
+    def refresh_analytics(self, force=False):
+        """Recompute the statistics of every product into a new CatalogueAnalytics snapshot
+
+        Unless forced, a rebuild within analytics_interval seconds of the last one
+        (or while another thread builds) is skipped and leaves analytics_stale set.
+        The engine lock is only held while copying products, a chunk at a time.
+        Returns True if the snapshot was rebuilt.
+        """
+        # Workers only hold fresh copies of the products they claimed, so they leave reports to others
+        if np is None or self.store is None or self.store.owner is not None:
+            return False
+        started = time.monotonic()
+        if not force and self.analytics_built_at is not None \
+                and started - self.analytics_built_at < self.analytics_interval:
+            self.analytics_stale = True
+            return False
+        if not self.analytics_lock.acquire(blocking=force):
+            self.analytics_stale = True
+            return False
+        try:
+            with self.lock:
+                self.analytics_stale = False
+                products = self.products
+            # Copied a chunk at a time, so a large catalogue never holds up the GUI or the sweep for long
+            copies = []
+            for start in range(0, len(products), 1000):
+                with self.lock:
+                    copies.extend(dict(product, price_history=product['price_history'].copy())
+                                  for product in products[start:start + 1000]
+                                  if self.store.get(product['id']) is product)
+            self.analytics = CatalogueAnalytics.build(copies)
+            self.analytics_built_at = started
+        finally:
+            self.analytics_lock.release()
+        return True
+
+    def catch_up_analytics(self):
+        """Rebuild analytics skipped since the last snapshot and let the front end show the new scores"""
+        if self.analytics_stale and self.refresh_analytics(force=True):
+            self.on_change(self.products)
+
+    def log_deals(self, top=10):
+        """Log the catalogue summary and the top deals by score"""
+        analytics = self.analytics
+        if analytics is None:
+            self.log_message("📊 Price analytics need numpy (pip install numpy)")
+            return
+        self.log_message(f"📊 {analytics.summary()}")
+        for rank, product_id in enumerate(analytics.top_deals(top), 1):
+            product = self.get_product(product_id)
+            if product is None:
+                continue
+            stats = analytics.row(product_id)
+            below = f", {stats['below90']:.0%} under 90-day median" if (stats['below90'] or 0) > 0 else ""
+            self.log_message(f"   {rank}. {product['name']}: ${stats['current']:.2f} (score {stats['score']:.0f}, "
+                             f"low ${stats['low']:.2f}{below})")
+
+    def record_sweep(self, seconds, success_ratio):
+        """Update the sweep metrics and rewrite the metrics file"""
+        self.metrics.observe('sweep_duration_seconds', seconds)
+        self.metrics.set('sweep_success_ratio', success_ratio)
+        self.metrics.set('products', len(self.store.by_id))
+        self.metrics.set('backlog', self.scheduler.overdue())
+        if self.metrics_file:
+            try:
+                self.metrics.write(self.metrics_file)
+            except OSError as e:
+                self.log_message(f"Error writing metrics: {str(e)}")
+
+    def check_product_price(self, product):
+        """Check price for a single product and send alert if needed"""
+        current_price, tier = self.get_product_price(product['url'])
+        with self.lock:
+            if self.store.get(product['id']) is not product:
+                return  # removed while it was being fetched
+            self.apply_price(product, current_price, tier)
+            self.scheduler.reschedule(product, current_price is not None, self.check_interval * 60)
+            self.save_data()
+        self.refresh_analytics()
+        self.on_change([product])
+
+    def apply_price(self, product, current_price, tier=None):
+        """Record a fetched price for a product and send alert if needed"""
+        product['last_checked'] = datetime.now().isoformat()
+        self.store.update(product)
+
+        if current_price is None:
+            self.log_message(f"❌ Failed to get price for {product['name']}")
+            return
+
+        old_price = product['current_price']
+        product['current_price'] = current_price
+        product['price_source'] = tier
+
+        # Add to price history (older points are rolled up, not dropped)
+        timestamp = time.time()
+        product['price_history'].append(current_price, timestamp)
+        self.store.record_price(product, current_price, timestamp)
+
+        # Check if price dropped below target
+        if current_price <= product['target_price']:
+            savings = product['target_price'] - current_price
+            self.log_message(f"🎉 TARGET REACHED! {product['name']} is now ${current_price:.2f} (Save ${savings:.2f})")
+            self.alert(product)
+
+        elif old_price and current_price < old_price:
+            savings = old_price - current_price
+            self.log_message(f"📉 Price dropped for {product['name']}: ${old_price:.2f} → ${current_price:.2f} (Save ${savings:.2f})")
+
+        elif old_price and current_price > old_price:
+            increase = current_price - old_price
+            self.log_message(f"📈 Price increased for {product['name']}: ${old_price:.2f} → ${current_price:.2f} (+${increase:.2f})")
+
+        else:
+            self.log_message(f"➡️ Price unchanged for {product['name']}: ${current_price:.2f}")
+
+    def alert(self, product):
+        """Queue a target-reached alert unless the product is still in its cooldown"""
+        if self.alerts.submit(product):
+            self.store.update(product)
+        else:
+            self.log_message(f"🔕 Alert for {product['name']} suppressed (alerted recently at this price or lower)")
+
+    def reextract_archive(self, apply=False):
+        """Re-run extraction over every archived page and compare with what was extracted then
+
+        Each page's price is matched to the recorded observation of every product
+        showing that item within MATCH_WINDOW seconds; differing prices are
+        corrected and missing ones backfilled when apply is set. Pages older than
+        the full-resolution tier replace the daily rollup of their product and
+        day, but only when the archive holds every reading the rollup counts.
+        Applying also moves current_price to a corrected newest observation and
+        makes the cache re-parse pages whose price changed. Returns a dict with
+        the counts and the per-tier/selector hits before and after.
+        """
+        if self.archive is None:
+            raise RuntimeError("no page archive configured")
+
+        by_key = {}
+        for product in self.products:
+            by_key.setdefault(self.site_registry.fetch_key(product['url'])[0], []).append(product)
+
+        def replay(page):
+            try:
+                return page, self.replay_price(self.archive.read(page[3]), page[1])
+            except Exception as e:
+                self.log_message(f"Error replaying {page[1]}: {str(e)}")
+                return page, None
+
+        pages = self.archive.pages()
+        before, after = Counter(), Counter()
+        report = {'pages': len(pages), 'unreadable': 0, 'hits_before': 0, 'hits_after': 0,
+                  'corrected': 0, 'backfilled': 0, 'partial_days': 0}
+        updates = []
+        # Re-extracted readings of days already folded into rollups, by (product id, day bucket)
+        cutoff = self.store.compaction_cutoff()
+        rolled = {}
+        changed_urls = set()
+        with ThreadPoolExecutor(max(self.parser_pool.workers, 1) * 2) as executor:
+            for page, result in executor.map(replay, pages):
+                if result is None:
+                    report['unreadable'] += 1
+                    continue
+                _, _, _, _, old_price, old_tier, old_selector = page
+                price, tier, selector = result
+                if old_price is not None:
+                    report['hits_before'] += 1
+                    before[(old_tier, old_selector or '')] += 1
+                if price is None:
+                    continue
+                report['hits_after'] += 1
+                after[(tier, selector if tier == 'site-selector' else '')] += 1
+                if price != old_price:
+                    changed_urls.add(page[1])
+                for product in by_key.get(page[0], []):
+                    point = self.store.nearest_point(product['id'], page[2], MATCH_WINDOW)
+                    if point is None and page[2] < cutoff:
+                        # Already compacted: rebuilt below from all of the day's readings
+                        bucket = page[2] // BUCKET_SECONDS * BUCKET_SECONDS
+                        rolled.setdefault((product['id'], bucket), []).append((page[2], price, old_price))
+                        continue
+                    if point is None:
+                        updates.append((product['id'], page[2], price))
+                        report['backfilled'] += 1
+                    elif point[1] != price:
+                        updates.append((product['id'], point[0], price))
+                        report['corrected'] += 1
+
+        # A rollup cannot say which of its readings was wrong, so a day is rebuilt from the archive
+        # only when the archive has all of them (or the day is missing altogether)
+        rollups = []
+        for (product_id, bucket), readings in rolled.items():
+            readings.sort()
+            prices = [price for _, price, _ in readings]
+            rollup = (min(prices), max(prices), prices[-1], len(prices))
+            existing = self.store.rollup(product_id, bucket)
+            if existing is None:
+                report['backfilled'] += len(readings)
+            elif existing['count'] != len(readings):
+                report['partial_days'] += 1
+                continue
+            elif tuple(existing) == rollup:
+                continue
+            else:
+                report['corrected'] += sum(1 for _, price, old_price in readings if price != old_price) or 1
+            rollups.append((product_id, bucket, *rollup))
+
+        report['before'], report['after'] = before, after
+        self.log_message(f"🗄️ Re-extracted {len(pages)} archived pages: prices found "
+                         f"{report['hits_before']} → {report['hits_after']}, "
+                         f"{report['corrected']} observations differ, {report['backfilled']} missing"
+                         + (f", {report['partial_days']} rolled-up days only partly archived (kept)"
+                            if report['partial_days'] else ""))
+        for tier, selector in sorted(set(before) | set(after), key=lambda k: (k[0] or '', k[1])):
+            self.log_message(f"   {tier}{' ' + selector if selector else ''}: "
+                             f"{before[(tier, selector)]} → {after[(tier, selector)]}")
+        if apply and (updates or rollups):
+            # Newest rewritten observation of each product (a rollup stands for its day's last reading)
+            newest = {}
+            for product_id, ts, _ in updates:
+                newest[product_id] = max(newest.get(product_id, ts), ts)
+            for product_id, bucket, *_ in rollups:
+                newest[product_id] = max(newest.get(product_id, bucket), bucket)
+            with self.lock:
+                self.save_data()
+                self.store.put_points(updates)
+                self.store.put_rollups(rollups)
+                products = [product for product in map(self.store.get, newest) if product is not None]
+                self.store.reload_histories(products)
+                for product in products:
+                    latest = product['price_history'].latest()
+                    if latest and latest[0] == newest[product['id']] and latest[1] != product['current_price']:
+                        product['current_price'] = latest[1]
+                        self.store.update(product)
+                for url in changed_urls:
+                    self.page_cache.invalidate(url)
+                self.save_data()
+            self.refresh_analytics(force=True)
+            self.on_change(products)
+            self.log_message(f"✏️ Wrote {len(updates)} corrected or backfilled price observations "
+                             f"and {len(rollups)} rebuilt daily rollups")
+        return report
+
+    def run(self, stop_event):
+        """Check each product whenever its adaptive schedule says so, until stop_event is set"""
+        for product in self.products:
+            self.scheduler.schedule(product, self.check_interval * 60)
+
+        while not stop_event.is_set():
+            due = self.scheduler.pop_due(limit=self.batch_size)
+            if due:
+                self.log_message(f"🔍 Checking {len(due)} due products...")
+                self.check_products(due)
+                continue
+            self.catch_up_analytics()
+            # Wake up for the next due product, but at least once a minute
+            wait = self.scheduler.seconds_until_next()
+            stop_event.wait(60 if wait is None else min(wait, 60))
+
+    def run_worker(self, stop_event, owner, until_idle=False):
+        """Check products claimed from the shared database's work queue until stop_event is set
+
+        Any number of processes on the database's host can run this at once
+        (SQLite's WAL mode needs shared memory, so not across machines). Each
+        due product is leased to one worker, the lease is renewed while its check
+        runs and the product's next check time and failure count are written back
+        when it is released, so products of a crashed worker become due again
+        once their leases lapse. With until_idle the worker returns once nothing
+        is due any more, leased or not.
+        """
+        self.store.owner = owner
+        while not stop_event.is_set():
+            claimed, failures = self.store.claim(owner, self.batch_size, self.lease_seconds)
+            if not claimed:
+                # Due products still leased by others may belong to a crashed worker: wait for their leases
+                if until_idle and not self.store.due_count():
+                    return
+                wait = self.store.seconds_until_due()
+                # Poll at least once a minute for products added or released by others, and
+                # every second when only waiting for the rest of the fleet to finish
+                limit = 1 if until_idle else 60
+                stop_event.wait(limit if wait is None else min(max(wait, 1), limit))
+                continue
+
+            # Failure counts travel with the product, so its backoff builds up whichever worker checks it
+            self.scheduler.set_failures(failures)
+            done = threading.Event()
+            renewer = threading.Thread(target=self.renew_leases, args=(owner, claimed, done), daemon=True)
+            renewer.start()
+            try:
+                self.check_products(claimed)
+            finally:
+                done.set()
+                renewer.join()
+                retry_at = time.time() + self.scheduler.min_interval
+                self.store.release(owner, {product['id']: (self.scheduler.due_at.get(product['id'], retry_at),
+                                                           self.scheduler.failures.get(product['id'], 0))
+                                           for product in claimed})
+                for product in claimed:
+                    self.scheduler.remove(product)
+
+    def renew_leases(self, owner, products, done):
+        """Keep the leases on products alive until done is set"""
+        ids = [product['id'] for product in products]
+        while not done.wait(self.lease_seconds / 3):
+            try:
+                held = self.store.renew(owner, ids, self.lease_seconds)
+            except sqlite3.Error as e:
+                self.log_message(f"Error renewing leases: {str(e)}")
+                continue
+            if held < len(ids):
+                self.log_message(f"⚠️ Lost the lease on {len(ids) - held} products; their results will not be saved")
+
+    def save_data(self):
+        """Commit pending product changes and price observations"""
+        try:
+            started = time.perf_counter()
+            self.store.commit()
+            self.metrics.observe('store_write_seconds', time.perf_counter() - started)
+            self.store.put_page_cache(self.page_cache.changes())
+            self.sessions.save_cookies()
+        except Exception as e:
+            self.log_message(f"Error saving data: {str(e)}")
+
+    def load_data(self):
+        """Open the product store, migrating the old JSON file if present"""
+        try:
+            self.store = ProductStore(self.db_file)
+            self.migrated = self.store.migrate_json(self.data_file)
+            self.store.load_products()
+            self.page_cache = ResponseCache(self.store.read_page_cache())
+        except Exception as e:
+            self.log_message(f"Error loading data: {str(e)}")
+
+    def close(self):
+        self.alerts.close()
+        self.parser_pool.close()
+        self.save_data()
+        self.sessions.close()
+        self.store.close()
+        if self.archive is not None:
+            self.archive.close()
+
+
+def worker_file(path, index):
+    """Per-worker variant of a file name: metrics.prom -> metrics.w2.prom"""
+    root, ext = os.path.splitext(path)
+    return f"{root}.w{index}{ext}"
+
+
+def setup_logging(args, prefix=""):
+    handlers = [logging.StreamHandler(sys.stdout)]
+    if args.log_file:
+        handlers.append(logging.FileHandler(args.log_file, encoding='utf-8'))
+    logging.basicConfig(level=logging.INFO, format=f"[%(asctime)s] {prefix}%(message)s",
+                        datefmt="%Y-%m-%d %H:%M:%S", handlers=handlers)
+    return logging.getLogger("price_tracker")
+
+
+def make_engine(args, logger, worker=None):
+    """TrackerEngine configured from the command line; worker is the index in a --workers fleet"""
+    def log_alert(digest):
+        for alert in digest:
+            logger.info(f"🎯 PRICE ALERT: {describe(alert)}")
+
+    sinks = []
+    if args.alert_log:
+        sinks.append(LogFileSink(args.alert_log))
+    if args.webhook:
+        sinks.append(WebhookSink(args.webhook))
+    if args.smtp_to:
+        sinks.append(SmtpSink(args.smtp_to, host=args.smtp_host))
+
+    engine = TrackerEngine(db_file=args.db, log=logger.info, on_alert=log_alert, alert_sinks=sinks)
+    engine.check_interval = args.interval
+    engine.request_delay = args.request_delay
+    # Workers of a fleet each space out their own requests; together they keep to the per-host delay
+    engine.rate_limiter = engine.fetch_engine.rate_limiter = HostRateLimiter(
+        delay=args.request_delay * (args.workers if worker is not None else 1))
+    if args.parse_workers is not None:
+        engine.parser_pool.workers = args.parse_workers
+    engine.metrics_file = args.metrics_file
+    engine.profile_file = args.profile_sweep
+    engine.report_top = args.report
+    engine.lease_seconds = args.lease
+    if args.archive:
+        engine.archive = PageArchive(args.archive)
+
+    if worker is not None:
+        # The cookies file is rewritten whole, so every worker keeps its own
+        engine.sessions.cookies_file = worker_file("cookies.json", worker)
+        if args.metrics_file:
+            engine.metrics_file = worker_file(args.metrics_file, worker)
+    return engine
+
+
+def worker_main(args, index):
+    """Entry point of one process of a --workers fleet"""
+    logger = setup_logging(args, f"w{index} ")
+    engine = make_engine(args, logger, worker=index)
+    if args.metrics_port:
+        engine.metrics.serve(args.metrics_port + index)
+
+    stop_event = threading.Event()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, lambda *_: stop_event.set())
+    try:
+        engine.run_worker(stop_event, f"{socket.gethostname()}:{os.getpid()}", until_idle=args.once)
+    finally:
+        engine.close()
+
+
+def run_workers(args, logger, stop_event):
+    """Run args.workers worker processes on the shared database until they finish or stop_event is set"""
+    context = multiprocessing.get_context('spawn')
+    processes = [context.Process(target=worker_main, args=(args, index), name=f"price-tracker-w{index}")
+                 for index in range(args.workers)]
+    for process in processes:
+        process.start()
+    logger.info(f"🚀 Started {args.workers} workers on {args.db}")
+    while any(process.is_alive() for process in processes) and not stop_event.is_set():
+        stop_event.wait(1)
+    for process in processes:
+        if process.is_alive():
+            process.terminate()
+    for process in processes:
+        process.join()
+
+
+def main(argv=None):
+    """Headless entry point: track prices from the command line without tkinter"""
+    parser = argparse.ArgumentParser(description="Price Tracker Bot (headless)")
+    parser.add_argument('--headless', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--interval', type=int, default=30,
+                        help='base minutes between checks, adapted per product (default 30)')
+    parser.add_argument('--once', action='store_true', help='check every product once and exit')
+    parser.add_argument('--db', default='tracked_products.db', help='product database file')
+    parser.add_argument('--log-file', help='also write the activity log to this file')
+    parser.add_argument('--import', dest='import_file', metavar='FILE',
+                        help='add the products listed in FILE (CSV or JSON Lines: url, name, target_price) first')
+    parser.add_argument('--request-delay', type=float, default=2,
+                        help='seconds between requests to the same host (default 2)')
+    parser.add_argument('--workers', type=int, default=0,
+                        help='check products in N processes sharing the database as a work queue '
+                             '(all on the host that holds --db)')
+    parser.add_argument('--lease', type=float, default=300, metavar='SECONDS',
+                        help='with --workers, how long a claimed product stays reserved without renewal (default 300)')
+    parser.add_argument('--parse-workers', type=int,
+                        help='processes used for HTML parsing (default: one per CPU, 0 = none)')
+    parser.add_argument('--metrics-file', help='rewrite Prometheus-format metrics to this file after every sweep')
+    parser.add_argument('--metrics-port', type=int, help='serve Prometheus metrics on http://127.0.0.1:PORT/metrics')
+    parser.add_argument('--profile-sweep', metavar='FILE', help='write a cProfile dump of the first sweep to FILE')
+    parser.add_argument('--archive', metavar='DIR', help='keep compressed copies of fetched pages in DIR')
+    parser.add_argument('--reextract', action='store_true',
+                        help='re-run extraction over the --archive pages, report the differences and exit')
+    parser.add_argument('--apply', action='store_true',
+                        help='with --reextract, correct and backfill the stored price history')
+    parser.add_argument('--report', type=int, default=0, metavar='N',
+                        help='log a catalogue summary and the N best deals after every sweep')
+    parser.add_argument('--alert-log', help='append price alerts to this file')
+    parser.add_argument('--webhook', help='POST price alerts as JSON to this URL')
+    parser.add_argument('--smtp-to', help='email price alerts to this address')
+    parser.add_argument('--smtp-host', default='localhost', help='SMTP relay for --smtp-to (default localhost)')
+    args = parser.parse_args(argv)
+    if args.reextract and not args.archive:
+        parser.error("--reextract needs --archive DIR")
+
+    logger = setup_logging(args)
+    engine = make_engine(args, logger)
+
+    if args.reextract:
+        try:
+            engine.reextract_archive(apply=args.apply)
+        finally:
+            engine.close()
+        return
+
+    stop_event = threading.Event()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, lambda *_: stop_event.set())
+
+    if args.import_file:
+        try:
+            # The sweeps below give the new products their first check
+            engine.import_products(args.import_file, fetch_prices=False)
+        except (OSError, ValueError, sqlite3.Error) as e:
+            logger.error(f"Import failed: {str(e)}")
+            engine.close()
+            sys.exit(1)
+
+    if args.workers:
+        if args.once:
+            engine.store.make_all_due()
+        engine.close()
+        run_workers(args, logger, stop_event)
+        logger.info("⏹️ Tracking stopped")
+        return
+
+    if args.metrics_port:
+        engine.metrics.serve(args.metrics_port)
+    logger.info(f"🚀 Tracking {len(engine.products)} products"
+                + ("" if args.once else f" - base interval {args.interval} minutes, adapted per product"))
+    try:
+        if args.once:
+            engine.check_all_products()
+        else:
+            engine.run(stop_event)
+    finally:
+        engine.close()
+        logger.info("⏹️ Tracking stopped")
+
+
+if __name__ == "__main__":
+    main()